@@ -44,6 +44,38 @@ def save_exiftool_path_to_file(path: str):
         logger.error(f"Ошибка сохранения пути ExifTool: {e}")
 
 
+def _settings_file() -> str:
+    """Файл настроек интерфейса — в папке пользователя, рядом с кэшем"""
+    return os.path.join(os.path.dirname(get_user_cache_dir()), "settings.json")
+
+
+def _read_settings() -> dict:
+    try:
+        with open(_settings_file(), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def get_setting(key: str, default=None):
+    """Читает параметр из файла настроек пользователя"""
+    return _read_settings().get(key, default)
+
+
+def set_setting(key: str, value):
+    """Сохраняет параметр в файл настроек, не затрагивая остальные"""
+    try:
+        data = _read_settings()
+        data[key] = value
+        path = _settings_file()
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, path)
+    except Exception as e:
+        logger.error(f"Ошибка сохранения настройки {key}: {e}")
+
+
 def set_exiftool_path(path: str):
     global EXIFTOOL_PATH
     EXIFTOOL_PATH = path
@@ -53,3 +85,12 @@ def set_exiftool_path(path: str):
 def get_exiftool_path() -> str | None:
     global EXIFTOOL_PATH
     return EXIFTOOL_PATH
+
+
+def get_user_cache_dir() -> str:
+    """Папка пользовательского кэша GeoTagger (создаётся при необходимости)"""
+    base = os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME") \
+        or os.path.join(os.path.expanduser("~"), ".cache")
+    path = os.path.join(base, "GeoTagger", "cache")
+    os.makedirs(path, exist_ok=True)
+    return path
@@ -0,0 +1,43 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from logic.track_index import STATUS_MATCHED, STATUS_MISS, STATUS_NEAREST
+
+
+@dataclass
+class CoverageReport:
+    """Сколько снимков и как получат координаты — до записи файлов"""
+    interpolated: int = 0   # время внутри трека, координаты интерполируются
+    nearest: int = 0        # используется ближайшая точка
+    outside: int = 0        # вне трека — координаты не будут записаны
+    no_date: int = 0        # нет DateTimeOriginal
+    first_outside: float | None = None  # самый ранний снимок вне трека
+    last_outside: float | None = None
+
+    @property
+    def total(self) -> int:
+        return self.interpolated + self.nearest + self.outside + self.no_date
+
+    def summary(self) -> str:
+        return (f"интерполяция — {self.interpolated}, ближайшая точка — {self.nearest}, "
+                f"вне трека — {self.outside}, без даты — {self.no_date} "
+                f"(всего {self.total})")
+
+
+def build_coverage_report(timestamps, status, no_date: int = 0) -> CoverageReport:
+    """
+    Сводка по результатам сопоставления: число снимков в каждом статусе
+    и интервал времени снимков, не попавших на трек.
+    """
+    status = np.asarray(status)
+    counts = np.bincount(status, minlength=3) if status.size else np.zeros(3, dtype=int)
+    report = CoverageReport(interpolated=int(counts[STATUS_MATCHED]),
+                            nearest=int(counts[STATUS_NEAREST]),
+                            outside=int(counts[STATUS_MISS]),
+                            no_date=no_date)
+    outside = np.asarray(timestamps)[status == STATUS_MISS]
+    if outside.size:
+        report.first_outside = float(outside.min())
+        report.last_outside = float(outside.max())
+    return report
@@ -1,39 +1,84 @@
 import os
 import subprocess
 from datetime import datetime, timedelta
-import gpxpy
+from itertools import repeat
+import numpy as np
 import piexif
 
 from logic.time_sync import get_datetime_from_image
 from logic.exif_utils import find_exiftool
 from logic.file_manager import SUPPORTED_EXTENSIONS
 from logic.dialog_utils import confirm_overwrite_gps
+from logic.coverage import build_coverage_report
 from logic.logger import get_logger
+from logic.match_quality import compute_match_quality
+from logic.offset_estimator import OffsetEstimate, estimate_time_offset
+from logic.privacy_zones import ZONE_ACTION_FUZZ, fuzz_coordinates, load_exclusion_zones
+from logic.track_array import TrackArray, from_epoch, to_epoch_array
+from logic.track_cache import get_track, get_track_index, get_track_window
+from logic.track_index import (
+    TrackIndex, build_track_index, DEFAULT_MAX_GAP, NEAREST_POINT_LIMIT, STATUS_MISS, STATUS_NEAREST
+)
+from logic.track_library import TrackLibrary
+from logic.track_shared import shared_track_pool, worker_track_index
+from logic.track_simplify import simplify_track
 
 logger = get_logger()
 
 
-def process_images(folder_path: str, gpx_path: str, time_correction: str = "0:00", confirm_callback=None) -> tuple[int, int]:
+def process_images(folder_path: str, gpx_path=None, time_correction: str = "0:00", confirm_callback=None,
+                   max_gap_seconds: float | None = DEFAULT_MAX_GAP,
+                   track_library: str | None = None,
+                   prune_margin: float | None = None,
+                   simplify_tolerance_m: float | None = None,
+                   workers: int | None = None,
+                   dry_run: bool = False,
+                   min_confidence: float | None = None,
+                   privacy_zones: str | None = None,
+                   zone_action: str = "skip") -> tuple[int, int, dict]:
     """
     Обрабатывает изображения, добавляя GPS-координаты из GPX-файла.
 
     Args:
         folder_path: Путь к папке с изображениями
-        gpx_path: Путь к GPX-файлу
+        gpx_path: Путь к GPX-файлу, папке с GPX или список путей
+            (несколько треков сливаются в один по времени)
         time_correction: Поправка времени в формате "±ч:мм"
         confirm_callback: Функция для подтверждения перезаписи GPS
+        max_gap_seconds: Пауза трека, через которую не интерполировать
+            (None — без ограничения)
+        track_library: Папка архива GPX; используется, если gpx_path не задан —
+            разбираются только треки, пересекающиеся со временем снимков
+        prune_margin: Если задан — загружать только участок трека от первого
+            до последнего снимка плюс этот запас (сек); запас не меньше
+            max_gap_seconds сохраняет результат интерполяции на краях
+        simplify_tolerance_m: Если задан — трек прореживается перед
+            индексированием с допуском отклонения позиций в метрах
+        workers: Если больше 1 — время съёмки читается и сопоставляется
+            с треком в пуле процессов; трек передаётся им через
+            разделяемую память. Применяется, когда трек задан целиком
+            (gpx_path без prune_margin)
+        dry_run: Только сопоставить снимки с треком и вывести сводку,
+            ничего не записывая
+        min_confidence: Если задан — снимки с уверенностью сопоставления
+            ниже порога (0..1) пропускаются
+        privacy_zones: GeoJSON с зонами приватности (дом, объекты клиентов)
+        zone_action: Что делать со снимками внутри зон: "skip" — не
+            записывать координаты, "fuzz" — записать огрублённые
 
     Returns:
-        (обновлено, всего): Количество обновленных файлов и общее количество
+        (обновлено, всего, качество): Количество обновленных файлов, общее
+        количество и показатели сопоставления {имя файла: {"gap", "interval",
+        "speed", "confidence"}}
     """
     logger.info(f"Начата обработка изображений в: {folder_path}")
-    logger.info(f"Используем GPX: {gpx_path}")
+    if gpx_path is not None:
+        logger.info(f"Используем GPX: {gpx_path}")
+    else:
+        logger.info(f"Используем архив GPX: {track_library}")
     logger.info(f"Поправка времени: {time_correction}")
 
     corrected_delta = parse_time_correction(time_correction)
-    gpx_data = parse_gpx(gpx_path)
-    if not gpx_data:
-        raise Exception("GPX-файл не содержит координат")
 
     files = [
         f for f in os.listdir(folder_path)
@@ -45,23 +90,109 @@ def process_images(folder_path: str, gpx_path: str, time_correction: str = "0:00
 
     logger.info(f"Найдено {total} изображений для обработки")
 
-    for i, filename in enumerate(files):
-        filepath = os.path.join(folder_path, filename)
-        dt_original = get_datetime_from_image(filepath)
-
-        if not dt_original:
-            logger.warning(f"{filename} — отсутствует дата съёмки")
-            continue
-
-        corrected_dt = dt_original + corrected_delta
-        lat, lon = find_matching_coordinate(gpx_data, corrected_dt)
-
-        if lat is None or lon is None:
+    window = None  # участок трека на время снимков (при prune_margin)
+    if workers and workers > 1 and gpx_path is not None and prune_margin is None:
+        # Трек известен заранее: чтение дат и сопоставление идут в пуле
+        track_index = get_track_index(gpx_path, max_gap_seconds,
+                                      simplify_tolerance_m)
+        if not track_index:
+            raise Exception("GPX-файл не содержит координат")
+        photos, (lats, lons, status) = collect_and_match_parallel(
+            folder_path, files, corrected_delta, track_index, workers)
+        timestamps = to_epoch_array([dt for _, _, dt in photos])
+    else:
+        # Сначала собираем время съёмки, затем сопоставляем все снимки разом
+        photos = collect_photo_times(folder_path, files, corrected_delta)
+        timestamps = to_epoch_array([dt for _, _, dt in photos])
+
+        if gpx_path is None and track_library:
+            gpx_path = find_library_tracks(track_library, timestamps)
+            if not gpx_path:
+                raise Exception("В архиве GPX нет треков на даты снимков")
+
+        if prune_margin is not None and len(timestamps):
+            window = get_track_window(gpx_path,
+                                      float(timestamps.min()) - prune_margin,
+                                      float(timestamps.max()) + prune_margin)
+            track = window
+            if simplify_tolerance_m:
+                track = simplify_track(track, simplify_tolerance_m, max_gap_seconds)
+            track_index = build_track_index(track, max_gap_seconds)
+        else:
+            track_index = get_track_index(gpx_path, max_gap_seconds,
+                                          simplify_tolerance_m)
+        if not track_index:
+            raise Exception("GPX-файл не содержит координат")
+
+        lats, lons, status = match_coordinates(track_index, timestamps)
+
+    # Качество сопоставления каждого снимка — одним пакетом. Считается по
+    # исходному треку: у упрощённого точки реже, и интервалы до них
+    # занижали бы уверенность при точной интерполяции
+    quality_index = track_index
+    if simplify_tolerance_m:
+        quality_index = (build_track_index(window, max_gap_seconds) if window is not None
+                         else get_track_index(gpx_path, max_gap_seconds))
+    match_quality = compute_match_quality(quality_index, timestamps, status)
+    quality = {
+        filename: {"gap": float(gap), "interval": float(interval),
+                   "speed": float(speed), "confidence": float(confidence)}
+        for (filename, _, _), gap, interval, speed, confidence in zip(
+            photos, match_quality.gap, match_quality.interval,
+            match_quality.speed, match_quality.confidence)
+    }
+
+    # Сводка до записи: сколько снимков получат координаты и каким способом
+    report = build_coverage_report(timestamps, status, no_date=total - len(photos))
+    logger.info(f"Предварительная проверка: {report.summary()}")
+    if report.outside:
+        logger.warning(
+            f"Вне трека снимки с {from_epoch(report.first_outside)} "
+            f"по {from_epoch(report.last_outside)} (с учётом поправки)")
+    low_confidence = np.zeros(len(photos), dtype=bool)
+    if min_confidence:
+        low_confidence = (status != STATUS_MISS) & (match_quality.confidence < min_confidence)
+        if low_confidence.any():
+            logger.warning(
+                f"Уверенность ниже {min_confidence:.2f}: "
+                f"{int(low_confidence.sum())} снимков будут пропущены")
+    zone_ids = np.full(len(photos), -1)
+    if privacy_zones:
+        zones = load_exclusion_zones(privacy_zones)
+        located = status != STATUS_MISS
+        zone_ids[located] = zones.locate(lats[located], lons[located])
+        in_zones = int(np.count_nonzero(zone_ids >= 0))
+        if in_zones:
+            verb = "огрублены" if zone_action == ZONE_ACTION_FUZZ else "пропущены"
+            logger.warning(f"В зонах приватности {in_zones} снимков — координаты будут {verb}")
+    if dry_run:
+        logger.info("Пробный запуск: файлы не изменялись")
+        return 0, total, quality
+
+    for (filename, filepath, corrected_dt), lat, lon, st, low, zone_id in zip(
+            photos, lats, lons, status, low_confidence, zone_ids):
+        if st == STATUS_MISS:
             logger.warning(
                 f"{filename} — координаты не найдены на {corrected_dt}")
             continue
+        confidence = quality[filename]["confidence"]
+        if low:
+            logger.warning(
+                f"{filename} — пропущен: низкая уверенность ({confidence:.2f})")
+            continue
+        if st == STATUS_NEAREST:
+            logger.warning(f"{filename} — использована ближайшая точка")
 
-        logger.info(f"{filename}: координаты — {lat:.6f}, {lon:.6f}")
+        lat, lon = float(lat), float(lon)
+        if zone_id >= 0:
+            if zone_action != ZONE_ACTION_FUZZ:
+                logger.warning(f"{filename} — пропущен: зона приватности «{zones.names[zone_id]}»")
+                continue
+            lat, lon = fuzz_coordinates(lat, lon)
+            logger.warning(f"{filename} — координаты огрублены: зона «{zones.names[zone_id]}»")
+        logger.info(
+            f"{filename}: координаты — {lat:.6f}, {lon:.6f} "
+            f"(уверенность {confidence:.2f})")
 
         has_gps = has_gps_in_exif(filepath)
 
@@ -75,7 +206,7 @@ def process_images(folder_path: str, gpx_path: str, time_correction: str = "0:00
                 if action == "cancel":
                     logger.warning("Пользователь отменил обработку")
                     # Немедленно прерываем обработку
-                    return updated, total
+                    return updated, total, quality
                 elif action == "overwrite":
                     pass  # Продолжаем запись
                 elif action == "skip":
@@ -94,10 +225,93 @@ def process_images(folder_path: str, gpx_path: str, time_correction: str = "0:00
         else:
             logger.error(f"Не удалось записать EXIF в {filename}")
 
-    return updated, total
+    return updated, total, quality
+
+
+def collect_photo_times(folder_path: str, files: list, corrected_delta: timedelta) -> list:
+    """Возвращает [(имя, путь, исправленное время)] для снимков с датой"""
+    photos = []
+    for filename in files:
+        filepath = os.path.join(folder_path, filename)
+        dt_original = get_datetime_from_image(filepath)
+
+        if not dt_original:
+            logger.warning(f"{filename} — отсутствует дата съёмки")
+            continue
+
+        photos.append((filename, filepath, dt_original + corrected_delta))
+    return photos
+
+
+def _date_and_match(items: list, corrected_delta: timedelta):
+    """
+    Выполняется в процессе пула: читает время съёмки части снимков
+    и сопоставляет его с треком из разделяемой памяти. Журнал у каждого
+    процесса свой, поэтому записанные здесь сообщения возвращаются
+    вместе с результатом.
+    """
+    log_start = len(logger.text_log)
+    dated = []
+    for filename, filepath in items:
+        dt_original = get_datetime_from_image(filepath)
+        dated.append((filename, filepath,
+                      dt_original + corrected_delta if dt_original else None))
+    timestamps = to_epoch_array([dt for _, _, dt in dated if dt is not None])
+    matched = match_coordinates(worker_track_index(), timestamps)
+    messages = logger.text_log[log_start:]
+    del logger.text_log[log_start:]
+    return dated, matched, messages
+
+
+def collect_and_match_parallel(folder_path: str, files: list, corrected_delta: timedelta,
+                               track_index: TrackIndex, workers: int):
+    """
+    Параллельный вариант collect_photo_times + match_coordinates.
+
+    Returns:
+        (photos, (lats, lons, status)) — в том же виде и порядке,
+        что и при последовательной обработке
+    """
+    items = [(filename, os.path.join(folder_path, filename)) for filename in files]
+    # Несколько частей на процесс выравнивают нагрузку
+    chunk = max(1, -(-len(items) // (workers * 4)))
+    chunks = [items[i:i + chunk] for i in range(0, len(items), chunk)]
+    logger.info(f"Чтение дат снимков в {workers} процессах")
+
+    photos, lats, lons, status = [], [], [], []
+    with shared_track_pool(track_index, workers) as pool:
+        for dated, (part_lats, part_lons, part_status), messages in pool.map(
+                _date_and_match, chunks, repeat(corrected_delta)):
+            logger.text_log.extend(messages)
+            for filename, filepath, dt in dated:
+                if dt is None:
+                    logger.warning(f"{filename} — отсутствует дата съёмки")
+                else:
+                    photos.append((filename, filepath, dt))
+            lats.append(part_lats)
+            lons.append(part_lons)
+            status.append(part_status)
+
+    if not photos:
+        empty = np.empty(0)
+        return photos, (empty, empty.copy(), np.empty(0, dtype=np.int8))
+    return photos, (np.concatenate(lats), np.concatenate(lons), np.concatenate(status))
+
+
+def find_library_tracks(archive_dir: str, timestamps) -> list:
+    """Выбирает из архива GPX треки, покрывающие время снимков"""
+    if len(timestamps) == 0:
+        return []
+    library = TrackLibrary(archive_dir)
+    library.refresh()
+    paths = library.find_tracks(float(timestamps.min()) - NEAREST_POINT_LIMIT,
+                                float(timestamps.max()) + NEAREST_POINT_LIMIT)
+    logger.info(f"Из архива GPX выбрано треков: {len(paths)}")
+    return paths
 
 
 def parse_time_correction(text: str) -> timedelta:
+    """Разбирает поправку «±ч:мм» или «±ч:мм:сс»"""
     try:
         sign = 1
         if text.startswith("-"):
@@ -105,53 +319,87 @@ def parse_time_correction(text: str) -> timedelta:
             text = text[1:]
         elif text.startswith("+"):
             text = text[1:]
-        hours, minutes = map(int, text.strip().split(":"))
-        return timedelta(hours=hours * sign, minutes=minutes * sign)
+        parts = list(map(int, text.strip().split(":")))
+        if len(parts) == 2:
+            parts.append(0)
+        hours, minutes, seconds = parts
+        return timedelta(hours=hours * sign, minutes=minutes * sign,
+                         seconds=seconds * sign)
     except Exception as e:
         logger.error(f"Ошибка в формате смещения времени: {e}")
         raise
 
 
-def parse_gpx(gpx_path: str) -> list:
+def estimate_folder_time_offset(folder_path: str, gpx_path,
+                                max_gap_seconds: float | None = DEFAULT_MAX_GAP,
+                                pinned: list | None = None) -> OffsetEstimate | None:
+    """
+    Подбирает поправку времени для папки по снимкам, у которых уже есть
+    GPS, и по отмеченным вручную снимкам.
+
+    Args:
+        pinned: [(имя файла, lat, lon)] — снимки с известным местом съёмки
+    """
+    pinned = {name: (lat, lon) for name, lat, lon in pinned or []}
+    files = [f for f in os.listdir(folder_path)
+             if f.lower().endswith(SUPPORTED_EXTENSIONS)]
+
+    times, lats, lons = [], [], []
+    for filename, filepath, dt in collect_photo_times(folder_path, files, timedelta()):
+        coords = pinned.get(filename) or read_gps_from_exif(filepath)
+        if coords:
+            times.append(dt)
+            lats.append(coords[0])
+            lons.append(coords[1])
+
+    logger.info(f"Снимков с известными координатами: {len(times)}")
+    if not times:
+        raise Exception("Нет снимков с координатами для подбора поправки")
+    track_index = get_track_index(gpx_path, max_gap_seconds)
+    return estimate_time_offset(track_index, to_epoch_array(times), lats, lons)
+
+
+def parse_gpx(gpx_path) -> TrackArray:
     try:
-        with open(gpx_path, "r", encoding="utf-8") as f:
-            gpx = gpxpy.parse(f)
-
-        points = []
-        for track in gpx.tracks:
-            for segment in track.segments:
-                for point in segment.points:
-                    if point.time:
-                        points.append({
-                            "time": point.time.replace(tzinfo=None),
-                            "lat": point.latitude,
-                            "lon": point.longitude
-                        })
-        logger.info(f"Извлечено {len(points)} точек из GPX")
-        return points
+        track_array = get_track(gpx_path)
+        logger.info(f"Извлечено {len(track_array)} точек из GPX")
+        return track_array
     except Exception as e:
         logger.error(f"Ошибка GPX парсинга: {e}")
-        return []
+        return TrackArray.empty()
 
 
-def find_matching_coordinate(gpx_data: list, timestamp: datetime):
-    for i in range(len(gpx_data) - 1):
-        pt1, pt2 = gpx_data[i], gpx_data[i + 1]
-        if pt1["time"] <= timestamp <= pt2["time"]:
-            total_diff = (pt2["time"] - pt1["time"]).total_seconds()
-            factor = (timestamp - pt1["time"]).total_seconds() / total_diff
-            lat = pt1["lat"] + (pt2["lat"] - pt1["lat"]) * factor
-            lon = pt1["lon"] + (pt2["lon"] - pt1["lon"]) * factor
-            return lat, lon
-    if gpx_data:
-        closest = min(gpx_data, key=lambda p: abs(
-            (p["time"] - timestamp).total_seconds()))
-        diff_sec = abs((closest["time"] - timestamp).total_seconds())
-        if diff_sec < 3600:
-            logger.warning(
-                f"Использована ближайшая точка ({diff_sec:.0f} сек)")
-            return closest["lat"], closest["lon"]
-    return None, None
+def find_matching_coordinate(track_index, timestamp: datetime):
+    """Ищет координаты по времени; принимает TrackIndex или TrackArray"""
+    if not isinstance(track_index, TrackIndex):
+        track_index = TrackIndex(track_index)
+    return track_index.find(timestamp)
+
+
+def match_coordinates(track_index: TrackIndex, timestamps):
+    """
+    Пакетный поиск координат для массива исправленных времён съёмки.
+
+    Стоимость — O(N log N) на сортировку времён плюс O(N log M) на поиск
+    в треке (бинарный поиск для каждого снимка). Времена сопоставляются
+    в порядке возрастания: соседние поиски идут по близким участкам
+    трека и попадают в кэш процессора — на треке в 2 млн точек это
+    вдвое быстрее, чем без сортировки.
+
+    Returns:
+        (lats, lons, status): массивы координат и статусов STATUS_*
+        в исходном порядке снимков
+    """
+    timestamps = to_epoch_array(timestamps)
+    order = np.argsort(timestamps, kind="stable")
+    sorted_lats, sorted_lons, sorted_status = track_index.match_many(timestamps[order])
+    lats = np.empty_like(sorted_lats)
+    lons = np.empty_like(sorted_lons)
+    status = np.empty_like(sorted_status)
+    lats[order] = sorted_lats
+    lons[order] = sorted_lons
+    status[order] = sorted_status
+    return lats, lons, status
 
 
 def deg_to_dms_rational(deg_float):
@@ -267,6 +515,48 @@ def write_gps_with_exiftool(filepath: str, lat: float, lon: float) -> bool:
         return False
 
 
+def _rational_to_degrees(value) -> float:
+    return sum(num / den / 60 ** i for i, (num, den) in enumerate(value) if den)
+
+
+def read_gps_from_exif(filepath: str) -> tuple | None:
+    """Координаты (lat, lon) из EXIF снимка или None"""
+    from logic.config import get_exiftool_path
+
+    ext = os.path.splitext(filepath)[1].lower()
+    if ext in ['.jpg', '.jpeg']:
+        try:
+            gps = piexif.load(filepath).get("GPS") or {}
+            lat = gps.get(piexif.GPSIFD.GPSLatitude)
+            lon = gps.get(piexif.GPSIFD.GPSLongitude)
+            if not lat or not lon:
+                return None
+            lat = _rational_to_degrees(lat)
+            lon = _rational_to_degrees(lon)
+            if gps.get(piexif.GPSIFD.GPSLatitudeRef) in (b"S", "S"):
+                lat = -lat
+            if gps.get(piexif.GPSIFD.GPSLongitudeRef) in (b"W", "W"):
+                lon = -lon
+            return lat, lon
+        except Exception:
+            return None
+    elif ext == '.arw':
+        exiftool = get_exiftool_path()
+        if not exiftool or not os.path.exists(exiftool):
+            return None
+        try:
+            cmd = [exiftool, "-n", "-GPSLatitude", "-GPSLongitude", "-s3", filepath]
+            result = subprocess.run(cmd, capture_output=True, text=True,
+                                    creationflags=subprocess.CREATE_NO_WINDOW,
+                                    cwd=os.path.dirname(exiftool))
+            coords = result.stdout.split()
+            if result.returncode == 0 and len(coords) >= 2:
+                return float(coords[0]), float(coords[1])
+        except Exception:
+            return None
+    return None
+
+
 def has_gps_in_exif(filepath: str) -> bool:
     from logic.config import get_exiftool_path
 
@@ -0,0 +1,189 @@
+from array import array
+import struct
+
+import numpy as np
+
+from logic.track_array import TrackArray
+
+FIT_FILE_EXTENSIONS = (".fit",)
+
+# Начало отсчёта времени FIT (1989-12-31 00:00:00 UTC) в секундах от эпохи Unix
+FIT_EPOCH_OFFSET = 631065600
+# Перевод полукругов (semicircles) в градусы
+SEMICIRCLES_TO_DEGREES = 180.0 / 2 ** 31
+
+# Глобальные номера сообщений и полей профиля FIT
+MESG_RECORD = 20
+MESG_EVENT = 21
+FIELD_TIMESTAMP = 253
+FIELD_POSITION_LAT = 0
+FIELD_POSITION_LONG = 1
+FIELD_EVENT = 0
+FIELD_EVENT_TYPE = 1
+
+EVENT_TIMER = 0
+EVENT_TYPE_START = 0
+EVENT_TYPES_STOP = (1, 4, 8, 9)  # stop, stop_all, stop_disable, stop_disable_all
+
+_INVALID_SINT32 = 0x7FFFFFFF
+_INVALID_UINT32 = 0xFFFFFFFF
+
+# Базовые типы FIT -> формат struct
+_BASE_TYPES = {
+    0x00: "B", 0x01: "b", 0x02: "B", 0x83: "h", 0x84: "H", 0x85: "i",
+    0x86: "I", 0x88: "f", 0x89: "d", 0x0A: "B", 0x8B: "H", 0x8C: "I",
+    0x0D: "B", 0x8E: "q", 0x8F: "Q", 0x90: "Q",
+}
+# Поля, которые нужно распаковывать: (глобальный номер сообщения, номер поля)
+_WANTED = {
+    (MESG_RECORD, FIELD_POSITION_LAT), (MESG_RECORD, FIELD_POSITION_LONG),
+    (MESG_EVENT, FIELD_EVENT), (MESG_EVENT, FIELD_EVENT_TYPE),
+}
+
+
+class _Definition:
+    """Описание локального сообщения: как распаковать нужные поля"""
+
+    def __init__(self, global_num: int, big_endian: bool, fields: list,
+                 dev_size: int):
+        fmt = [">" if big_endian else "<"]
+        self.slots = {}
+        for num, size, base_type in fields:
+            code = _BASE_TYPES.get(base_type)
+            wanted = num == FIELD_TIMESTAMP or (global_num, num) in _WANTED
+            if wanted and code and struct.calcsize(code) == size:
+                self.slots[num] = len(self.slots)
+                fmt.append(code)
+            else:
+                fmt.append(f"{size}x")
+        if dev_size:
+            fmt.append(f"{dev_size}x")
+        self.global_num = global_num
+        self.struct = struct.Struct("".join(fmt))
+        self.size = self.struct.size
+
+
+def read_fit_track(fit_path: str, time_window: tuple | None = None) -> TrackArray:
+    """
+    Читает точки (сообщения record) из бинарного файла FIT в TrackArray.
+
+    Поддерживаются сжатые заголовки времени и несколько FIT-файлов,
+    записанных подряд. Остановка и запуск таймера (сообщения event)
+    начинают новый сегмент, как <trkseg> в GPX. Контрольные суммы не
+    проверяются.
+    """
+    with open(fit_path, "rb") as f:
+        data = f.read()
+
+    t_min, t_max = time_window or (-np.inf, np.inf)
+    times = array("d")
+    lats = array("d")
+    lons = array("d")
+    segments = array("i")
+    segment_id = 0
+    point_count = 0
+    file_count = 0
+
+    offset = 0
+    while offset + 12 <= len(data):
+        header_size = data[offset]
+        data_size = struct.unpack_from("<I", data, offset + 4)[0]
+        if data[offset + 8:offset + 12] != b".FIT":
+            raise ValueError(f"Файл не является FIT: {fit_path}")
+        pos = offset + header_size
+        end = min(pos + data_size, len(data))
+        offset = end + 2  # CRC файла
+        # Следующий файл в цепочке начинается с нового сегмента
+        if file_count:
+            segment_id += 1
+        file_count += 1
+
+        definitions = {}
+        last_timestamp = None
+        timer_stopped = False
+        while pos < end:
+            header = data[pos]
+            pos += 1
+            if header & 0x80:
+                # Сжатый заголовок: 5 младших бит времени от последней метки
+                local = (header >> 5) & 0x03
+                time_offset = header & 0x1F
+                if last_timestamp is not None:
+                    timestamp = (last_timestamp & ~0x1F) + time_offset
+                    if time_offset < (last_timestamp & 0x1F):
+                        timestamp += 0x20
+                    last_timestamp = timestamp
+                compressed = True
+            else:
+                local = header & 0x0F
+                compressed = False
+                if header & 0x40:
+                    pos = _read_definition(data, pos, local, bool(header & 0x20),
+                                           definitions)
+                    continue
+
+            definition = definitions.get(local)
+            if definition is None:
+                raise ValueError(
+                    f"FIT: сообщение без определения (локальный тип {local})")
+            values = definition.struct.unpack_from(data, pos)
+            pos += definition.size
+            slots = definition.slots
+
+            if not compressed and FIELD_TIMESTAMP in slots:
+                timestamp = values[slots[FIELD_TIMESTAMP]]
+                if timestamp != _INVALID_UINT32:
+                    last_timestamp = timestamp
+
+            if definition.global_num == MESG_RECORD:
+                point_count += 1
+                if FIELD_POSITION_LAT not in slots or FIELD_POSITION_LONG not in slots:
+                    continue
+                lat = values[slots[FIELD_POSITION_LAT]]
+                lon = values[slots[FIELD_POSITION_LONG]]
+                if last_timestamp is None or \
+                        lat == _INVALID_SINT32 or lon == _INVALID_SINT32:
+                    continue
+                t = float(last_timestamp + FIT_EPOCH_OFFSET)
+                if not t_min <= t <= t_max:
+                    continue
+                times.append(t)
+                lats.append(lat * SEMICIRCLES_TO_DEGREES)
+                lons.append(lon * SEMICIRCLES_TO_DEGREES)
+                segments.append(segment_id)
+
+            elif definition.global_num == MESG_EVENT:
+                if slots.get(FIELD_EVENT) is None or \
+                        values[slots[FIELD_EVENT]] != EVENT_TIMER or \
+                        FIELD_EVENT_TYPE not in slots:
+                    continue
+                event_type = values[slots[FIELD_EVENT_TYPE]]
+                if event_type in EVENT_TYPES_STOP:
+                    timer_stopped = True
+                elif event_type == EVENT_TYPE_START and timer_stopped:
+                    timer_stopped = False
+                    segment_id += 1
+
+    return TrackArray.from_columns(times, lats, lons, segments,
+                                   file_count, point_count)
+
+
+def _read_definition(data: bytes, pos: int, local: int, has_dev_fields: bool,
+                     definitions: dict) -> int:
+    """Разбирает сообщение-определение, возвращает позицию за ним"""
+    big_endian = data[pos + 1] == 1
+    global_num = struct.unpack_from(">H" if big_endian else "<H", data, pos + 2)[0]
+    field_count = data[pos + 4]
+    pos += 5
+    fields = [tuple(data[pos + 3 * i:pos + 3 * i + 3]) for i in range(field_count)]
+    pos += 3 * field_count
+
+    dev_size = 0
+    if has_dev_fields:
+        dev_count = data[pos]
+        pos += 1
+        dev_size = sum(data[pos + 3 * i + 1] for i in range(dev_count))
+        pos += 3 * dev_count
+
+    definitions[local] = _Definition(global_num, big_endian, fields, dev_size)
+    return pos
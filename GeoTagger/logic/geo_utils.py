@@ -1,14 +1,68 @@
-from timezonefinder import TimezoneFinder
+import threading
+from functools import lru_cache
+
+import numpy as np
 import pytz
+from timezonefinder import TimezoneFinder
 
+# Точность округления координат для кэша часовых поясов (~10 м)
+TIMEZONE_CACHE_PRECISION = 4
+TIMEZONE_CACHE_SIZE = 16384
 
-def get_timezone(lat: float, lon: float):
-    tf = TimezoneFinder()
-    tz_name = tf.timezone_at(lat=lat, lng=lon)
+_finder = None
+_finder_lock = threading.Lock()
+
+
+def _get_finder() -> TimezoneFinder:
+    """Общий TimezoneFinder: данные полигонов загружаются один раз"""
+    global _finder
+    if _finder is None:
+        with _finder_lock:
+            if _finder is None:
+                _finder = TimezoneFinder()
+    return _finder
+
+
+def warm_up_timezone_finder() -> threading.Thread:
+    """Загружает данные часовых поясов в фоновом потоке"""
+    thread = threading.Thread(target=_get_finder, name="tz-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+@lru_cache(maxsize=TIMEZONE_CACHE_SIZE)
+def _timezone_name(lat: float, lon: float) -> str | None:
+    finder = _get_finder()
+    with _finder_lock:
+        return finder.timezone_at(lat=lat, lng=lon)
+
+
+def _rounded(value: float) -> float:
+    return round(float(value), TIMEZONE_CACHE_PRECISION)
+
+
+def _timezone(key: tuple):
+    tz_name = _timezone_name(*key)
     if tz_name:
         return pytz.timezone(tz_name)
     return None
 
 
+def get_timezone(lat: float, lon: float):
+    return _timezone((_rounded(lat), _rounded(lon)))
+
+
+def get_timezones(lats, lons) -> list:
+    """
+    Часовые пояса для массива точек. Совпадающие (после округления)
+    координаты ищутся один раз; округление то же, что в get_timezone.
+    """
+    keys = [(_rounded(lat), _rounded(lon)) for lat, lon in
+            zip(np.asarray(lats, dtype=np.float64).tolist(),
+                np.asarray(lons, dtype=np.float64).tolist())]
+    zones = {key: _timezone(key) for key in set(keys)}
+    return [zones[key] for key in keys]
+
+
 def coords_to_string(lat: float, lon: float) -> str:
     return f"{lat:.6f}, {lon:.6f}"
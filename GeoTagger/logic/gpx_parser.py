@@ -1,50 +1,39 @@
 from datetime import datetime
-import gpxpy
+import pytz
 from logic.geo_utils import get_timezone
+from logic.track_cache import get_track, get_track_index, resolve_track_paths
+from logic.track_reader import probe_track_file
+from logic.track_array import from_epoch
+from logic.track_stats import compute_track_stats
+from logic.track_analytics import analyze_track_motion
+from logic.track_timezones import find_timezone_spans
 from logic.logger import get_logger
 
 # Инициализация логгера
 logger = get_logger()
 
+# Значение поля, которое заполнит полный разбор трека
+PENDING = "…"
 
-def parse_gpx_metadata(gpx_path: str) -> dict:
+
+def parse_gpx_metadata(gpx_path) -> dict:
     """Парсит GPX и возвращает начальное и конечное время, и местное время старта"""
     logger.info(f"Анализ GPX-файла: {gpx_path}")
 
-    with open(gpx_path, "r", encoding="utf-8") as f:
-        gpx = gpxpy.parse(f)
-
-    points = []
-    for track in gpx.tracks:
-        for segment in track.segments:
-            for point in segment.points:
-                if point.time:
-                    points.append(point)
+    track = get_track(gpx_path)
 
-    if not points:
+    if not track:
         logger.error("В GPX-файле не найдено ни одной точки с временем")
         raise ValueError("В GPX-файле не найдено ни одной точки с временем")
 
-    # Определим стартовую и конечную точку
-    first_point = points[0]
-    last_point = points[-1]
+    info = _time_info(float(track.times[0]), float(track.times[-1]),
+                      float(track.lats[0]), float(track.lons[0]))
+    start_utc_str, end_utc_str = info["start"], info["end"]
+    start_local, tzname = info["start_local"], info["timezone"]
 
-    # Время в UTC
-    start_utc = first_point.time
-    end_utc = last_point.time
-
-    # Получаем временную зону по координатам
-    tz = get_timezone(first_point.latitude, first_point.longitude)
-    tzname = tz.zone if tz else "UTC"
-
-    # Переводим стартовое UTC в локальное по координатам
-    start_local = start_utc.astimezone(tz).strftime(
-        "%Y-%m-%d %H:%M:%S") if tz else "—"
-    start_utc_str = start_utc.strftime("%Y-%m-%d %H:%M:%S")
-    end_utc_str = end_utc.strftime("%Y-%m-%d %H:%M:%S")
-
-    # Проверяем, пересекает ли трек несколько часовых поясов
-    timezone_warning = check_multiple_timezones(points)
+    # Интервалы трека по часовым поясам
+    timezone_spans = find_timezone_spans(track)
+    timezone_warning = check_multiple_timezones(timezone_spans)
 
     logger.info(
         f"Трек начинается: {start_utc_str} UTC, заканчивается: {end_utc_str} UTC")
@@ -53,84 +42,127 @@ def parse_gpx_metadata(gpx_path: str) -> dict:
     if timezone_warning:
         logger.warning(
             "Трек пересекает несколько часовых поясов. Используется зона старта.")
+        for span in timezone_spans:
+            logger.info(f"  {format_time(span.start)} – {format_time(span.end)} UTC: "
+                        f"{span.zone or 'пояс не определён'}")
+
+    # Дистанция, время в движении и остановки
+    motion = analyze_track_motion(track)
+    stops_time = sum(stop.duration for stop in motion.stops)
+    logger.info(
+        f"Дистанция: {motion.distance_m / 1000:.2f} км, в движении: "
+        f"{format_duration(motion.moving_time)}, остановок: {len(motion.stops)}")
+
+    # Индекс строим заранее, чтобы обработка начиналась без ожидания
+    get_track_index(gpx_path)
+
+    return {
+        **info,
+        "timezone_warning": timezone_warning,
+        "timezone_spans": timezone_spans,
+        "timezones": " → ".join(span.zone or "?" for span in timezone_spans),
+        "distance": f"{motion.distance_m / 1000:.2f} км",
+        "moving_time": (f"{format_duration(motion.moving_time)} "
+                        f"(ср. {motion.avg_moving_speed * 3.6:.1f} км/ч, "
+                        f"макс. {motion.max_speed * 3.6:.1f} км/ч)"),
+        "stopped_time": format_duration(motion.stopped_time),
+        "stops": f"{len(motion.stops)} (всего {format_duration(stops_time)})"
+    }
+
+
+def probe_gpx_metadata(gpx_path) -> dict:
+    """
+    Быстрые сведения для панели трека: время начала/конца и местное время
+    старта по первой и последней точке, без полного разбора файла.
+    Если проба не удалась, выполняется полный разбор. Конец сжатых
+    треков проба не определяет — он остаётся PENDING до полного разбора.
+    """
+    probes = []
+    for path in resolve_track_paths(gpx_path):
+        probe = probe_track_file(path)
+        if probe is None:
+            return parse_gpx_metadata(gpx_path)
+        probes.append(probe)
+    if not probes:
+        raise ValueError("Не выбран ни один GPX-файл")
+
+    first = min(probes, key=lambda p: p["start"])
+    ends = [p["end"] for p in probes]
+    end = None if None in ends else max(ends)
+    info = _time_info(first["start"], end, first["start_lat"], first["start_lon"])
+    if end is None:
+        logger.info(f"Трек начинается: {info['start']} UTC, конец — после полного разбора")
+    else:
+        logger.info(
+            f"Трек начинается: {info['start']} UTC, заканчивается: {info['end']} UTC")
+    logger.info(f"Местное время старта: {info['start_local']} ({info['timezone']})")
+    return info
 
+
+def _time_info(start: float, end: float | None, lat: float, lon: float) -> dict:
+    """Строки времени начала/конца (UTC) и местного времени старта"""
+    start_utc = pytz.utc.localize(from_epoch(start))
+
+    # Получаем временную зону по координатам
+    tz = get_timezone(lat, lon)
+    tzname = tz.zone if tz else "UTC"
+
+    # Переводим стартовое UTC в локальное по координатам
+    start_local = start_utc.astimezone(tz).strftime(
+        "%Y-%m-%d %H:%M:%S") if tz else "—"
     return {
-        "start": start_utc_str,
-        "end": end_utc_str,
+        "start": start_utc.strftime("%Y-%m-%d %H:%M:%S"),
+        "end": format_time(end) if end is not None else PENDING,
         "start_local": start_local,
         "timezone": tzname,
-        "timezone_warning": timezone_warning
     }
 
 
-def check_multiple_timezones(points):
-    """Проверяет, пересекает ли трек несколько часовых поясов"""
-    if len(points) < 2:
-        return False
+def format_time(timestamp: float) -> str:
+    """Секунды от эпохи (UTC) в строку «ГГГГ-ММ-ДД ЧЧ:ММ:СС»"""
+    return from_epoch(timestamp).strftime("%Y-%m-%d %H:%M:%S")
 
-    # Берем первую и последнюю точки
-    first_point = points[0]
-    last_point = points[-1]
 
-    # Получаем временные зоны
-    first_tz = get_timezone(first_point.latitude, first_point.longitude)
-    last_tz = get_timezone(last_point.latitude, last_point.longitude)
+def format_duration(seconds: float) -> str:
+    """Форматирует длительность как «Xч Yм Zс»"""
+    hours = int(seconds // 3600)
+    minutes = int((seconds % 3600) // 60)
+    secs = int(seconds % 60)
+    return f"{hours}ч {minutes}м {secs}с"
 
-    # Если зоны разные, возвращаем True
-    if first_tz and last_tz and first_tz.zone != last_tz.zone:
-        return True
 
-    return False
+def check_multiple_timezones(timezone_spans: list):
+    """Проверяет, пересекает ли трек несколько часовых поясов"""
+    # Учитываются все смены пояса по треку (интервалы find_timezone_spans),
+    # а не только первая и последняя точка
+    zones = {span.zone for span in timezone_spans if span.zone}
+    return len(zones) > 1
 
 
-def analyze_gpx_file(gpx_path: str):
+def analyze_gpx_file(gpx_path):
     """Анализирует GPX-файл и возвращает информацию о нем"""
     logger.info(f"Детальный анализ GPX-файла: {gpx_path}")
 
     try:
-        with open(gpx_path, "r", encoding="utf-8") as f:
-            gpx = gpxpy.parse(f)
-
-        # Общая информация
-        track_count = len(gpx.tracks)
-        segment_count = sum(len(track.segments) for track in gpx.tracks)
-        point_count = sum(sum(len(segment.points)
-                          for segment in track.segments) for track in gpx.tracks)
+        track = get_track(gpx_path)
 
-        # Точки с временем
-        points_with_time = sum(sum(sum(1 for point in segment.points if point.time)
-                                   for segment in track.segments) for track in gpx.tracks)
+        # Все показатели — за один проход по треку
+        stats = compute_track_stats(track)
+        track_count = stats.track_count
+        segment_count = stats.segment_count
+        point_count = stats.point_count
+        points_with_time = stats.points_with_time
 
         # Временной диапазон
-        all_points = []
-        for track in gpx.tracks:
-            for segment in track.segments:
-                for point in segment.points:
-                    if point.time:
-                        all_points.append(point)
-
-        if all_points:
-            all_points.sort(key=lambda p: p.time)
-            time_range = (all_points[-1].time -
-                          all_points[0].time).total_seconds()
-            hours = int(time_range // 3600)
-            minutes = int((time_range % 3600) // 60)
-            seconds = int(time_range % 60)
-            time_range_str = f"{hours}ч {minutes}м {seconds}с"
+        if points_with_time:
+            time_range_str = format_duration(stats.duration)
         else:
             time_range_str = "Нет точек с временем"
 
         # Географический охват
-        if point_count > 0:
-            min_lat = min(
-                point.latitude for track in gpx.tracks for segment in track.segments for point in segment.points)
-            max_lat = max(
-                point.latitude for track in gpx.tracks for segment in track.segments for point in segment.points)
-            min_lon = min(
-                point.longitude for track in gpx.tracks for segment in track.segments for point in segment.points)
-            max_lon = max(
-                point.longitude for track in gpx.tracks for segment in track.segments for point in segment.points)
-            geo_range = f"Широта: {min_lat:.6f} - {max_lat:.6f}, Долгота: {min_lon:.6f} - {max_lon:.6f}"
+        if points_with_time:
+            geo_range = (f"Широта: {stats.min_lat:.6f} - {stats.max_lat:.6f}, "
+                         f"Долгота: {stats.min_lon:.6f} - {stats.max_lon:.6f}")
         else:
             geo_range = "Нет точек с координатами"
 
@@ -0,0 +1,381 @@
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+import bz2
+import gzip
+import mmap
+import os
+import re
+import xml.etree.ElementTree as ET
+import zipfile
+
+import numpy as np
+
+from logic.logger import get_logger
+from logic.track_array import TrackArray, merge_tracks, to_epoch
+
+logger = get_logger()
+
+# Файлы больше этого размера разбираются параллельно по частям
+PARALLEL_THRESHOLD = 64 * 1024 * 1024
+# Минимальный размер одной части при параллельном разборе
+MIN_CHUNK_SIZE = 16 * 1024 * 1024
+# Блок чтения и предел поиска для быстрой пробы начала/конца трека
+PROBE_BLOCK_SIZE = 64 * 1024
+PROBE_LIMIT = 16 * 1024 * 1024
+# Сколько байт конца блока без начала точки переносить в следующий блок
+PROBE_OVERLAP = 1024
+
+# GPX и сжатые GPX (читаются без распаковки на диск)
+GPX_FILE_EXTENSIONS = (".gpx", ".gpx.gz", ".gpx.bz2", ".zip")
+
+_PREFIX = rb"(?:[\w.-]+:)?"
+# Начало сегмента или точки — допустимые места разреза файла
+_BOUNDARY_RE = re.compile(rb"<" + _PREFIX + rb"(?:trkseg|trkpt)\b")
+# Токены части: <trk ...>, <trkseg ...> либо целая точка <trkpt ...>...</trkpt>
+_TOKEN_RE = re.compile(
+    rb"<" + _PREFIX + rb"(?:(trkseg|trk)\b[^>]*"
+    rb"|trkpt\b([^>]*?)(?:/|>(.*?)</" + _PREFIX + rb"trkpt\s*))>",
+    re.DOTALL)
+_LAT_RE = re.compile(rb"\blat\s*=\s*[\"']([^\"']+)")
+_LON_RE = re.compile(rb"\blon\s*=\s*[\"']([^\"']+)")
+_TIME_RE = re.compile(
+    rb"<" + _PREFIX + rb"time\s*>([^<]*)</" + _PREFIX + rb"time\s*>")
+# Доли секунды: fromisoformat до Python 3.11 принимает только 3 или 6 цифр
+_FRACTION_RE = re.compile(r"\.(\d+)")
+
+
+def _local_name(tag: str) -> str:
+    """Имя тега без пространства имён: '{ns}trkpt' -> 'trkpt'"""
+    return tag.rsplit("}", 1)[-1]
+
+
+def parse_gpx_time(text: str) -> float | None:
+    """Переводит время GPX (ISO 8601) в секунды от эпохи UTC"""
+    # Приводим к виду, который понимает fromisoformat и в Python 3.10
+    text = text.strip()
+    if text[-1:] in ("Z", "z"):
+        text = text[:-1] + "+00:00"
+    text = _FRACTION_RE.sub(lambda m: "." + m.group(1).ljust(6, "0")[:6], text, count=1)
+    try:
+        dt = datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return to_epoch(dt)
+
+
+def read_gpx_track(source, time_window: tuple | None = None) -> TrackArray:
+    """
+    Потоково читает точки <trkpt> из GPX прямо в TrackArray.
+
+    Дерево XML не строится целиком: каждый разобранный элемент сразу
+    очищается, поэтому пик памяти определяется размером выходных массивов.
+
+    Args:
+        source: Путь к файлу или бинарный файловый объект
+        time_window: (начало, конец) в секундах от эпохи — точки вне
+            окна отбрасываются сразу при чтении
+    """
+    t_min, t_max = time_window or (-np.inf, np.inf)
+    times = array("d")
+    lats = array("d")
+    lons = array("d")
+    segments = array("i")
+
+    segment_id = -1
+    current_segment = None
+    point_time = None
+    track_count = 0
+    point_count = 0
+
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        name = _local_name(elem.tag)
+
+        if event == "start":
+            if name == "trkseg":
+                segment_id += 1
+                current_segment = elem
+            elif name == "trk":
+                track_count += 1
+            continue
+
+        if name == "time":
+            point_time = elem.text
+        elif name == "trkpt":
+            point_count += 1
+            if point_time and current_segment is not None:
+                t = parse_gpx_time(point_time)
+                if t is not None and t_min <= t <= t_max:
+                    times.append(t)
+                    lats.append(float(elem.get("lat")))
+                    lons.append(float(elem.get("lon")))
+                    segments.append(segment_id)
+            point_time = None
+            elem.clear()
+            # Убираем очищенную точку из сегмента, чтобы дерево не росло
+            if current_segment is not None:
+                del current_segment[:]
+        elif name == "trkseg":
+            current_segment = None
+            elem.clear()
+        elif name in ("trk", "rte", "wpt", "metadata"):
+            point_time = None
+            elem.clear()
+
+    return TrackArray.from_columns(times, lats, lons, segments,
+                                   track_count, point_count)
+
+
+def _is_compressed(path: str) -> bool:
+    return path.lower().endswith((".gz", ".bz2", ".zip"))
+
+
+@contextmanager
+def open_gpx_streams(gpx_path: str):
+    """
+    Открывает файл трека как список бинарных потоков GPX.
+
+    .gz и .bz2 распаковываются на лету, из .zip берутся все вложенные
+    .gpx-файлы; временные файлы на диске не создаются.
+    """
+    lower = gpx_path.lower()
+    if lower.endswith(".zip"):
+        with zipfile.ZipFile(gpx_path) as zf:
+            members = [info for info in zf.infolist()
+                       if not info.is_dir() and info.filename.lower().endswith(".gpx")]
+            if not members:
+                raise ValueError(f"В архиве нет GPX-файлов: {gpx_path}")
+            streams = [zf.open(info) for info in members]
+            try:
+                yield streams
+            finally:
+                for stream in streams:
+                    stream.close()
+        return
+
+    if lower.endswith(".gz"):
+        stream = gzip.open(gpx_path, "rb")
+    elif lower.endswith(".bz2"):
+        stream = bz2.open(gpx_path, "rb")
+    else:
+        stream = open(gpx_path, "rb")
+    with stream:
+        yield [stream]
+
+
+def load_gpx_track(gpx_path: str, time_window: tuple | None = None) -> TrackArray:
+    """
+    Читает GPX: большие файлы — параллельно, остальные — потоково.
+    Сжатые файлы распаковываются в потоке разбора; несколько GPX из
+    одного zip-архива сливаются в один трек.
+    """
+    if _is_compressed(gpx_path):
+        with open_gpx_streams(gpx_path) as streams:
+            tracks = [read_gpx_track(stream, time_window) for stream in streams]
+        return tracks[0] if len(tracks) == 1 else merge_tracks(tracks)
+
+    if os.path.getsize(gpx_path) >= PARALLEL_THRESHOLD:
+        try:
+            return read_gpx_track_parallel(gpx_path, time_window=time_window)
+        except Exception as e:
+            logger.warning(
+                f"Параллельный разбор GPX не удался ({e}), читаем потоково")
+    return read_gpx_track(gpx_path, time_window)
+
+
+def read_gpx_track_parallel(gpx_path: str, workers: int | None = None,
+                            time_window: tuple | None = None) -> TrackArray:
+    """
+    Разбирает большой GPX в пуле процессов.
+
+    Файл отображается в память и режется по началу <trkseg>/<trkpt>,
+    части разбираются независимо, результаты склеиваются по порядку.
+    """
+    workers = workers or os.cpu_count() or 1
+    ranges = _split_gpx(gpx_path, workers)
+    logger.info(
+        f"Параллельный разбор GPX: {len(ranges)} частей, {workers} процессов")
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as pool:
+        parts = list(pool.map(_parse_gpx_chunk, [gpx_path] * len(ranges),
+                              *zip(*ranges), [time_window] * len(ranges)))
+
+    # Номера сегментов внутри части локальные: 0 — продолжение сегмента
+    # из предыдущей части, k — после k-го открытого <trkseg>
+    times, lats, lons, segments = [], [], [], []
+    segment_base = -1
+    track_count = point_count = 0
+    for part_times, part_lats, part_lons, part_segments, counts in parts:
+        opened, part_tracks, part_points = counts
+        times.append(part_times)
+        lats.append(part_lats)
+        lons.append(part_lons)
+        segments.append(part_segments + segment_base)
+        segment_base += opened
+        track_count += part_tracks
+        point_count += part_points
+
+    return TrackArray.from_columns(
+        np.concatenate(times), np.concatenate(lats),
+        np.concatenate(lons), np.concatenate(segments),
+        track_count, point_count)
+
+
+def _split_gpx(gpx_path: str, parts: int) -> list:
+    """Возвращает [(начало, конец)] частей файла, разрезанного по точкам"""
+    size = os.path.getsize(gpx_path)
+    parts = max(1, min(parts, size // MIN_CHUNK_SIZE))
+    with open(gpx_path, "rb") as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        cuts = [0]
+        for k in range(1, parts):
+            m = _BOUNDARY_RE.search(mm, max(cuts[-1] + 1, size * k // parts))
+            if not m:
+                break
+            cuts.append(m.start())
+    cuts.append(size)
+    return [(a, b) for a, b in zip(cuts, cuts[1:]) if b > a]
+
+
+def _parse_gpx_chunk(gpx_path: str, start: int, end: int, time_window=None):
+    """Разбирает часть файла [start, end) в процессе пула"""
+    t_min, t_max = time_window or (-np.inf, np.inf)
+    times = array("d")
+    lats = array("d")
+    lons = array("d")
+    segments = array("i")
+    segment_id = 0
+    track_count = point_count = 0
+
+    with open(gpx_path, "rb") as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        chunk = mm[start:end]
+
+    for m in _TOKEN_RE.finditer(chunk):
+        if m.group(1) == b"trkseg":
+            segment_id += 1
+            continue
+        if m.group(1) == b"trk":
+            track_count += 1
+            continue
+        point_count += 1
+        body = m.group(3)
+        if not body:
+            continue
+        time_match = _TIME_RE.search(body)
+        if not time_match:
+            continue
+        t = parse_gpx_time(time_match.group(1).decode("ascii", "ignore"))
+        attrs = m.group(2)
+        lat = _LAT_RE.search(attrs)
+        lon = _LON_RE.search(attrs)
+        if t is None or not lat or not lon or not t_min <= t <= t_max:
+            continue
+        times.append(t)
+        lats.append(float(lat.group(1)))
+        lons.append(float(lon.group(1)))
+        segments.append(segment_id)
+
+    return (np.frombuffer(times, dtype=np.float64),
+            np.frombuffer(lats, dtype=np.float64),
+            np.frombuffer(lons, dtype=np.float64),
+            np.frombuffer(segments, dtype=np.int32),
+            (segment_id, track_count, point_count))
+
+
+def _timed_points(data: bytes):
+    """Точки с временем в куске файла: [(время, lat, lon)] в порядке файла"""
+    points = []
+    for m in _TOKEN_RE.finditer(data):
+        if m.group(1) or not m.group(3):
+            continue
+        time_match = _TIME_RE.search(m.group(3))
+        lat = _LAT_RE.search(m.group(2))
+        lon = _LON_RE.search(m.group(2))
+        if not time_match or not lat or not lon:
+            continue
+        t = parse_gpx_time(time_match.group(1).decode("ascii", "ignore"))
+        if t is not None:
+            points.append((t, float(lat.group(1)), float(lon.group(1))))
+    return points
+
+
+def _probe_head(read_block) -> tuple | None:
+    """
+    Первая точка с временем от начала потока (не дальше PROBE_LIMIT).
+    Каждый блок просматривается один раз: к нему добавляется только
+    незавершённая последняя точка предыдущего блока.
+    """
+    pending = b""
+    consumed = 0
+    while consumed < PROBE_LIMIT:
+        block = read_block()
+        if not block:
+            break
+        consumed += len(block)
+        data = pending + block
+        points = _timed_points(data)
+        if points:
+            return points[0]
+        last = None
+        for last in _BOUNDARY_RE.finditer(data):
+            pass
+        pending = data[last.start():] if last else data[-PROBE_OVERLAP:]
+    return None
+
+
+def probe_gpx(gpx_path: str) -> dict | None:
+    """
+    Быстро находит первую и последнюю точку трека с временем, читая
+    только начало и конец файла. Время работы не зависит от размера.
+
+    Returns:
+        {"start", "end", "start_lat", "start_lon"} или None, если точки
+        не найдены в пределах PROBE_LIMIT. У сжатых файлов end — None
+    """
+    if _is_compressed(gpx_path):
+        return _probe_compressed(gpx_path)
+
+    size = os.path.getsize(gpx_path)
+    with open(gpx_path, "rb") as f:
+        first = _probe_head(lambda: f.read(PROBE_BLOCK_SIZE))
+        if first is None:
+            return None
+
+        last = None
+        block = PROBE_BLOCK_SIZE
+        while last is None:
+            start = max(0, size - block)
+            f.seek(start)
+            points = _timed_points(f.read(size - start))
+            last = points[-1] if points else None
+            if start == 0 or block >= PROBE_LIMIT:
+                break
+            block *= 2
+        if last is None:
+            return None
+
+    return {"start": first[0], "end": last[0],
+            "start_lat": first[1], "start_lon": first[2]}
+
+
+def _probe_compressed(gpx_path: str) -> dict | None:
+    """
+    Проба сжатого файла: распаковывается только начало потока. Последнюю
+    точку gzip/bz2 без распаковки всего потока не найти, поэтому конец
+    не определяется (None) — его заполнит полный разбор в фоне.
+    """
+    firsts = []
+    with open_gpx_streams(gpx_path) as streams:
+        for stream in streams:
+            first = _probe_head(lambda: stream.read(PROBE_BLOCK_SIZE))
+            if first is None:
+                return None
+            firsts.append(first)
+
+    first = min(firsts, key=lambda point: point[0])
+    return {"start": first[0], "end": None,
+            "start_lat": first[1], "start_lon": first[2]}
\ No newline at end of file
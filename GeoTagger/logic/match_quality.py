@@ -0,0 +1,73 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from logic.track_analytics import haversine
+from logic.track_array import to_epoch_array
+from logic.track_index import TrackIndex, STATUS_MATCHED, STATUS_NEAREST
+
+# Расстояние (м), при котором уверенность падает в e раз
+CONFIDENCE_DISTANCE_M = 200.0
+# Скорость (м/с), принимаемая для ближайшей точки, когда интерполяции нет
+ASSUMED_SPEED = 1.4
+
+
+@dataclass
+class MatchQuality:
+    """
+    Показатели качества сопоставления, массивы в порядке снимков:
+
+    gap — время (сек) до ближайшей точки трека;
+    interval — длительность отрезка трека, внутри которого интерполирована
+        позиция (NaN, если интерполяции не было);
+    speed — скорость (м/с) на этом отрезке (NaN без интерполяции);
+    uncertainty — оценка ошибки позиции (м): путь от ближайшей точки;
+    confidence — уверенность от 0 до 1.
+    """
+    gap: np.ndarray
+    interval: np.ndarray
+    speed: np.ndarray
+    uncertainty: np.ndarray
+    confidence: np.ndarray
+
+    def __len__(self):
+        return len(self.confidence)
+
+
+def compute_match_quality(track_index: TrackIndex, timestamps, status) -> MatchQuality:
+    """
+    Считает показатели качества для уже сопоставленных снимков одним
+    пакетом: ошибка позиции оценивается как путь, пройденный за время
+    от ближайшей точки трека, уверенность — exp(−ошибка / 200 м).
+    """
+    ts = to_epoch_array(timestamps)
+    status = np.asarray(status)
+    shape = ts.shape
+    gap = np.full(shape, np.nan)
+    interval = np.full(shape, np.nan)
+    speed = np.full(shape, np.nan)
+    uncertainty = np.full(shape, np.inf)
+
+    track = track_index.track
+    n = len(track)
+    if n and ts.size:
+        times = track.times
+        pos = np.searchsorted(times, ts, side="left")
+        hi = np.minimum(pos, n - 1)
+        lo = np.maximum(pos - 1, 0)
+        gap = np.minimum(np.abs(ts - times[lo]), np.abs(times[hi] - ts))
+
+        matched = status == STATUS_MATCHED
+        l, h = lo[matched], hi[matched]
+        interval[matched] = times[h] - times[l]
+        distance = haversine(track.lats[l], track.lons[l], track.lats[h], track.lons[h])
+        speed[matched] = np.divide(distance, interval[matched],
+                                   out=np.zeros_like(distance),
+                                   where=interval[matched] > 0)
+        uncertainty[matched] = gap[matched] * speed[matched]
+
+        nearest = status == STATUS_NEAREST
+        uncertainty[nearest] = gap[nearest] * ASSUMED_SPEED
+
+    confidence = np.exp(-uncertainty / CONFIDENCE_DISTANCE_M)
+    return MatchQuality(gap, interval, speed, uncertainty, confidence)
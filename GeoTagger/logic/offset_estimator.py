@@ -0,0 +1,115 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from logic.logger import get_logger
+from logic.track_analytics import haversine
+from logic.track_index import TrackIndex
+
+logger = get_logger()
+
+# Диапазон поиска поправки (сек): часовые пояса от −14 до +14 ч
+MAX_OFFSET = 14 * 3600
+# Уровни перебора: (шаг, полуширина окна вокруг лучших кандидатов).
+# Первый уровень покрывает весь диапазон, последний — с шагом в секунду
+SWEEP_LEVELS = ((60, MAX_OFFSET), (5, 90), (1, 5))
+# Сколько лучших кандидатов уточнять на следующем уровне
+SWEEP_CANDIDATES = 3
+# Снимков-ориентиров на грубых уровнях (на последнем — все)
+COARSE_SAMPLE_SIZE = 256
+# Доля ориентиров, которые должны попасть на трек при данной поправке
+MIN_COVERAGE = 0.5
+
+
+@dataclass
+class OffsetEstimate:
+    offset: int           # поправка, сек (прибавляется ко времени снимков)
+    residual_m: float     # медианное расстояние до трека, м
+    photos_used: int      # ориентиров, попавших на трек
+
+    @property
+    def correction(self) -> str:
+        """Поправка в формате поля «±ч:мм:сс»"""
+        return format_time_correction(self.offset)
+
+
+def format_time_correction(seconds: int) -> str:
+    sign = "-" if seconds < 0 else "+"
+    seconds = abs(int(seconds))
+    return f"{sign}{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def _sweep_costs(track_index: TrackIndex, times, lats, lons, offsets) -> tuple:
+    """
+    Медианная ошибка положения для каждой поправки: все сочетания
+    (поправка, снимок) сопоставляются с треком одним пакетным вызовом.
+    """
+    grid = (offsets[:, None] + times[None, :]).ravel()
+    track_lats, track_lons, _ = track_index.match_many(grid)
+    shape = (len(offsets), len(times))
+    errors = haversine(np.broadcast_to(lats, shape).ravel(),
+                       np.broadcast_to(lons, shape).ravel(),
+                       track_lats, track_lons).reshape(shape)
+    covered = np.count_nonzero(~np.isnan(errors), axis=1)
+    costs = np.full(len(offsets), np.inf)
+    enough = covered >= max(1, int(np.ceil(MIN_COVERAGE * len(times))))
+    if enough.any():
+        costs[enough] = np.nanmedian(errors[enough], axis=1)
+    return costs, covered
+
+
+def estimate_time_offset(track_index: TrackIndex, times, lats, lons,
+                         max_offset: int = MAX_OFFSET) -> OffsetEstimate | None:
+    """
+    Подбирает поправку времени по снимкам с известными координатами
+    (уже имеющим GPS или отмеченным пользователем).
+
+    Перебор идёт от грубого шага к точному: на каждом уровне окрестности
+    лучших кандидатов предыдущего уровня проверяются с меньшим шагом.
+
+    Args:
+        track_index: Индекс трека
+        times: Время съёмки ориентиров без поправки (секунды от эпохи)
+        lats, lons: Известные координаты ориентиров
+
+    Returns:
+        OffsetEstimate или None, если ни при какой поправке снимки
+        не ложатся на трек
+    """
+    times = np.asarray(times, dtype=np.float64)
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    if times.size == 0 or not track_index:
+        return None
+
+    # Грубые уровни считаются по равномерной выборке ориентиров
+    order = np.argsort(times)
+    sample = order[np.linspace(0, len(order) - 1,
+                               min(len(order), COARSE_SAMPLE_SIZE)).astype(int)]
+    sample = np.unique(sample)
+
+    candidates = np.array([0])
+    best = None
+    for level, (step, half_width) in enumerate(SWEEP_LEVELS):
+        last = level == len(SWEEP_LEVELS) - 1
+        subset = order if last else sample
+        if level == 0:
+            half_width = max_offset
+        offsets = np.unique(np.concatenate([
+            np.arange(c - half_width, c + half_width + 1, step) for c in candidates]))
+        offsets = offsets[np.abs(offsets) <= max_offset]
+        costs, covered = _sweep_costs(track_index, times[subset], lats[subset],
+                                      lons[subset], offsets.astype(np.float64))
+        if not np.isfinite(costs).any():
+            logger.warning("Подбор поправки: снимки не ложатся на трек")
+            return None
+        ranked = np.argsort(costs, kind="stable")
+        candidates = offsets[ranked[:SWEEP_CANDIDATES]]
+        candidates = candidates[np.isfinite(costs[ranked[:SWEEP_CANDIDATES]])]
+        best = (int(offsets[ranked[0]]), float(costs[ranked[0]]), int(covered[ranked[0]]))
+
+    estimate = OffsetEstimate(*best)
+    logger.info(
+        f"Подобрана поправка {estimate.correction}: медианное отклонение "
+        f"{estimate.residual_m:.1f} м по {estimate.photos_used} снимкам")
+    return estimate
@@ -0,0 +1,175 @@
+import json
+from collections import defaultdict
+
+import numpy as np
+
+from logic.logger import get_logger
+
+logger = get_logger()
+
+# Действия для снимков внутри зоны
+ZONE_ACTION_SKIP = "skip"   # координаты не записываются
+ZONE_ACTION_FUZZ = "fuzz"   # координаты огрубляются
+ZONE_ACTIONS = (ZONE_ACTION_SKIP, ZONE_ACTION_FUZZ)
+
+# Точность огрублённых координат: 2 знака (~1 км)
+FUZZ_DECIMALS = 2
+# Пределы размера ячейки сетки (градусы)
+MIN_CELL_SIZE = 1e-3
+MAX_CELL_SIZE = 1.0
+# Зоны, покрывающие больше ячеек, в сетку не попадают и проверяются
+# только по охватывающему прямоугольнику
+MAX_ZONE_CELLS = 64
+# Сколько пар «точка × ребро» проверять за одну векторную операцию
+PIP_BLOCK = 4 * 1024 * 1024
+
+
+class ExclusionZones:
+    """
+    Зоны приватности (многоугольники) с пространственным индексом.
+
+    Охватывающие прямоугольники зон разложены по равномерной сетке: для
+    точки проверяются только зоны из её ячейки, прошедшие сравнение с
+    прямоугольником, и лишь для них выполняется точная проверка
+    попадания в многоугольник (чётность пересечений луча с рёбрами).
+    Немногие крупные зоны хранятся отдельным списком, чтобы не
+    раздувать сетку.
+    """
+
+    def __init__(self, zones: list):
+        """
+        Args:
+            zones: [(имя, [кольцо, ...])], кольцо — массив (N, 2) пар
+                (долгота, широта); внутренние кольца задают вырезы
+        """
+        self.names = [name for name, _ in zones]
+        self._edges = []
+        boxes = []
+        for _, rings in zones:
+            rings = [np.asarray(ring, dtype=np.float64) for ring in rings]
+            start = np.concatenate(rings)
+            end = np.concatenate([np.roll(ring, -1, axis=0) for ring in rings])
+            self._edges.append((start[:, 0], start[:, 1], end[:, 0], end[:, 1]))
+            outer = rings[0]
+            boxes.append((outer[:, 0].min(), outer[:, 1].min(),
+                          outer[:, 0].max(), outer[:, 1].max()))
+        self.boxes = np.array(boxes, dtype=np.float64).reshape(-1, 4)
+
+        # Размер ячейки — порядка типичного размера зоны
+        if len(self.boxes):
+            extent = np.maximum(self.boxes[:, 2] - self.boxes[:, 0],
+                                self.boxes[:, 3] - self.boxes[:, 1])
+            self.cell_size = float(np.clip(np.median(extent), MIN_CELL_SIZE, MAX_CELL_SIZE))
+        else:
+            self.cell_size = MAX_CELL_SIZE
+        self._grid = defaultdict(list)
+        self._large = []
+        for zone_id, (x0, y0, x1, y1) in enumerate(self.boxes):
+            columns = self._cell(x1) - self._cell(x0) + 1
+            rows = self._cell(y1) - self._cell(y0) + 1
+            if columns * rows > MAX_ZONE_CELLS:
+                self._large.append(zone_id)
+                continue
+            for ix in range(self._cell(x0), self._cell(x1) + 1):
+                for iy in range(self._cell(y0), self._cell(y1) + 1):
+                    self._grid[(ix, iy)].append(zone_id)
+
+    def __len__(self):
+        return len(self.names)
+
+    def _cell(self, value: float) -> int:
+        return int(np.floor(value / self.cell_size))
+
+    def locate(self, lats, lons) -> np.ndarray:
+        """Номер зоны для каждой точки; −1 — вне зон (и для NaN)"""
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        result = np.full(lats.shape, -1, dtype=np.int64)
+        valid = np.flatnonzero(np.isfinite(lats) & np.isfinite(lons))
+        if not len(self) or not valid.size:
+            return result
+
+        # Кандидаты по сетке: точки группируются по ячейкам
+        cells = np.column_stack((np.floor(lons[valid] / self.cell_size),
+                                 np.floor(lats[valid] / self.cell_size))).astype(np.int64)
+        unique_cells, inverse = np.unique(cells, axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        order = np.argsort(inverse, kind="stable")
+        bounds = np.searchsorted(inverse[order], np.arange(len(unique_cells) + 1))
+
+        candidates = defaultdict(list)  # зона -> индексы точек
+        for k, (ix, iy) in enumerate(unique_cells):
+            zone_ids = self._grid.get((int(ix), int(iy)))
+            if zone_ids:
+                points = valid[order[bounds[k]:bounds[k + 1]]]
+                for zone_id in zone_ids:
+                    candidates[zone_id].append(points)
+        for zone_id in self._large:
+            candidates[zone_id].append(valid)
+
+        for zone_id, parts in candidates.items():
+            points = np.concatenate(parts)
+            points = points[result[points] < 0]
+            x, y = lons[points], lats[points]
+            x0, y0, x1, y1 = self.boxes[zone_id]
+            in_box = (x >= x0) & (x <= x1) & (y >= y0) & (y <= y1)
+            points, x, y = points[in_box], x[in_box], y[in_box]
+            if points.size:
+                inside = self._contains(zone_id, x, y)
+                result[points[inside]] = zone_id
+        return result
+
+    def _contains(self, zone_id: int, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Точная проверка точек (x, y) для одной зоны, блоками"""
+        ex0, ey0, ex1, ey1 = self._edges[zone_id]
+        inside = np.zeros(x.shape, dtype=bool)
+        step = max(1, PIP_BLOCK // max(len(ex0), 1))
+        for i in range(0, len(x), step):
+            px = x[i:i + step, None]
+            py = y[i:i + step, None]
+            crosses = (ey0 > py) != (ey1 > py)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                x_cross = ex0 + (py - ey0) * (ex1 - ex0) / (ey1 - ey0)
+            inside[i:i + step] = np.count_nonzero(crosses & (px < x_cross), axis=1) % 2 == 1
+        return inside
+
+
+def load_exclusion_zones(path: str) -> ExclusionZones:
+    """
+    Загружает зоны из GeoJSON (FeatureCollection, Feature или геометрия
+    Polygon/MultiPolygon). Имя зоны берётся из свойства name.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    if data.get("type") == "FeatureCollection":
+        features = data.get("features", [])
+    elif data.get("type") == "Feature":
+        features = [data]
+    else:
+        features = [{"type": "Feature", "geometry": data, "properties": {}}]
+
+    zones = []
+    for i, feature in enumerate(features):
+        geometry = feature.get("geometry") or {}
+        name = (feature.get("properties") or {}).get("name") or f"Зона {i + 1}"
+        if geometry.get("type") == "Polygon":
+            polygons = [geometry["coordinates"]]
+        elif geometry.get("type") == "MultiPolygon":
+            polygons = geometry["coordinates"]
+        else:
+            continue
+        for rings in polygons:
+            rings = [np.asarray(ring, dtype=np.float64)[:, :2] for ring in rings if len(ring) >= 3]
+            if rings:
+                zones.append((name, rings))
+
+    if not zones:
+        raise ValueError(f"В файле нет многоугольников зон: {path}")
+    logger.info(f"Загружено зон приватности: {len(zones)}")
+    return ExclusionZones(zones)
+
+
+def fuzz_coordinates(lat: float, lon: float) -> tuple:
+    """Огрубляет координаты до FUZZ_DECIMALS знаков"""
+    return round(lat, FUZZ_DECIMALS), round(lon, FUZZ_DECIMALS)
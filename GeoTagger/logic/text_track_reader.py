@@ -0,0 +1,323 @@
+import csv
+from functools import reduce
+import io
+from operator import xor
+import warnings
+import xml.etree.ElementTree as ET
+import zipfile
+
+import numpy as np
+
+from logic.gpx_reader import parse_gpx_time
+from logic.track_array import TrackArray
+
+NMEA_FILE_EXTENSIONS = (".nmea", ".nma")
+CSV_FILE_EXTENSIONS = (".csv",)
+KML_FILE_EXTENSIONS = (".kml", ".kmz")
+
+# Названия столбцов CSV (в нижнем регистре, сравниваются по началу)
+_CSV_TIME_COLUMNS = ("timestamp", "datetime", "date_time", "date time", "utc",
+                     "gps time", "time")
+_CSV_DATE_COLUMNS = ("date",)
+_CSV_LAT_COLUMNS = ("latitude", "lat")
+_CSV_LON_COLUMNS = ("longitude", "lon", "lng", "long")
+
+# Сколько начальных байт CSV смотреть для определения разделителя и заголовка
+_CSV_SNIFF_SIZE = 64 * 1024
+
+
+def parse_time_strings(values) -> np.ndarray:
+    """
+    Переводит строки времени ISO 8601 в секунды от эпохи (UTC) одной
+    векторной операцией; строки в других форматах разбираются по одной.
+    Неразобранные значения — NaN.
+    """
+    # Строки из одних цифр numpy принял бы за номер года — это не время
+    values = ["" if v.strip().isdigit() else v.strip() for v in values]
+    if not values:
+        return np.empty(0, dtype=np.float64)
+    try:
+        with warnings.catch_warnings():
+            # numpy предупреждает о смещении часового пояса, но учитывает его
+            warnings.simplefilter("ignore")
+            stamps = np.array([v[:-1] if v.endswith("Z") else v or "NaT" for v in values],
+                              dtype="datetime64[ms]")
+        times = stamps.astype(np.int64) / 1000.0
+        times[np.isnat(stamps)] = np.nan
+        return times
+    except ValueError:
+        times = [parse_gpx_time(v) for v in values]
+        return np.array([np.nan if t is None else t for t in times],
+                        dtype=np.float64)
+
+
+def _valid_rows(times, lats, lons, segments, time_window) -> tuple:
+    """Отбрасывает строки без времени/координат и вне окна времени"""
+    mask = np.isfinite(times) & np.isfinite(lats) & np.isfinite(lons)
+    if time_window is not None:
+        mask &= (times >= time_window[0]) & (times <= time_window[1])
+    return times[mask], lats[mask], lons[mask], segments[mask]
+
+
+def _to_floats(values) -> np.ndarray:
+    """Строки в числа; пустые и нечисловые значения — NaN"""
+    try:
+        return np.array(values, dtype=np.float64)
+    except ValueError:
+        out = np.full(len(values), np.nan)
+        for i, v in enumerate(values):
+            try:
+                out[i] = float(v)
+            except ValueError:
+                pass
+        return out
+
+
+# ---------- NMEA ----------
+
+def _nmea_checksum_ok(line: bytes) -> bool:
+    star = line.rfind(b"*")
+    if star < 0:
+        return True  # контрольная сумма необязательна
+    try:
+        expected = int(line[star + 1:star + 3], 16)
+    except ValueError:
+        return False
+    return reduce(xor, line[1:star], 0) == expected
+
+
+def _nmea_degrees(values: np.ndarray, hemispheres: list) -> np.ndarray:
+    """ddmm.mmmm / dddmm.mmmm и полушарие -> градусы со знаком"""
+    degrees = np.floor(values / 100)
+    result = degrees + (values - degrees * 100) / 60
+    negative = np.isin(np.array(hemispheres), ["S", "W"])
+    return np.where(negative, -result, result)
+
+
+def read_nmea_track(path: str, time_window: tuple | None = None) -> TrackArray:
+    """
+    Читает журнал NMEA 0183 по строкам, используя предложения RMC
+    ($GPRMC, $GNRMC и т.п.). Строки с неверной контрольной суммой
+    пропускаются; после потери фиксации (статус V) начинается новый сегмент.
+    """
+    clock, date, lat, lat_hemi, lon, lon_hemi, segments = [], [], [], [], [], [], []
+    segment_id = 0
+    fix_lost = False
+    point_count = 0
+
+    with open(path, "rb") as f:
+        for raw in f:
+            line = raw.strip()
+            start = line.find(b"$")
+            if start < 0 or line[start + 3:start + 7] != b"RMC,":
+                continue
+            line = line[start:]
+            if not _nmea_checksum_ok(line):
+                continue
+            fields = line.split(b"*")[0].decode("ascii", "ignore").split(",")
+            if len(fields) < 10:
+                continue
+            point_count += 1
+            if fields[2] != "A":
+                fix_lost = True
+                continue
+            if fix_lost:
+                segment_id += 1
+                fix_lost = False
+            clock.append(fields[1])
+            lat.append(fields[3])
+            lat_hemi.append(fields[4])
+            lon.append(fields[5])
+            lon_hemi.append(fields[6])
+            date.append(fields[9])
+            segments.append(segment_id)
+
+    if not clock:
+        return TrackArray.empty()
+
+    # ddmmyy + hhmmss.ss -> секунды от эпохи
+    iso_dates = [f"{'19' if d[4:6] >= '80' else '20'}{d[4:6]}-{d[2:4]}-{d[0:2]}"
+                 if len(d) == 6 else "" for d in date]
+    clock_values = _to_floats([c if c else "nan" for c in clock])
+    hours = np.floor(clock_values / 10000)
+    minutes = np.floor(clock_values / 100) % 100
+    seconds = clock_values % 100
+    times = parse_time_strings(iso_dates) + hours * 3600 + minutes * 60 + seconds
+
+    lats = _nmea_degrees(_to_floats(lat), lat_hemi)
+    lons = _nmea_degrees(_to_floats(lon), lon_hemi)
+    columns = _valid_rows(times, lats, lons, np.array(segments, dtype=np.int32),
+                          time_window)
+    return TrackArray.from_columns(*columns, track_count=1, point_count=point_count)
+
+
+# ---------- CSV ----------
+
+def _find_column(header: list, names: tuple, exclude: tuple = ()) -> int | None:
+    for name in names:
+        for i, title in enumerate(header):
+            if i not in exclude and title.startswith(name):
+                return i
+    return None
+
+
+def _signed_coordinates(values: list) -> np.ndarray:
+    """Координаты вида «55.75N» / «37.61E» или просто числа"""
+    if values and values[0][-1:].isalpha():
+        numbers = _to_floats([v[:-1] for v in values])
+        negative = np.array([v[-1:].upper() in ("S", "W") for v in values])
+        return np.where(negative, -numbers, numbers)
+    return _to_floats(values)
+
+
+def _csv_times(dates: list | None, clocks: list) -> np.ndarray:
+    """Столбец времени (или дата + время) в секунды от эпохи"""
+    if dates is not None and not any(sep in clocks[0] for sep in "-/"):
+        # Компактные YYMMDD и HHMMSS (например, логгеры Columbus)
+        if dates and len(dates[0]) == 6 and dates[0].isdigit():
+            dates = [f"20{d[0:2]}-{d[2:4]}-{d[4:6]}" for d in dates]
+        if clocks and len(clocks[0]) == 6 and clocks[0].isdigit():
+            clocks = [f"{c[0:2]}:{c[2:4]}:{c[4:6]}" for c in clocks]
+        return parse_time_strings([f"{d}T{c}" for d, c in zip(dates, clocks)])
+
+    numbers = _to_floats(clocks)
+    numeric = np.count_nonzero(np.isfinite(numbers))
+    filled = sum(1 for c in clocks if c.strip())
+    if numeric and numeric * 2 > filled:
+        # Время в секундах (или миллисекундах) от эпохи Unix; пустые
+        # и нечисловые ячейки остаются NaN
+        return numbers / 1000.0 if np.nanmax(numbers) > 1e11 else numbers
+    return parse_time_strings(clocks)
+
+
+def read_csv_track(path: str, time_window: tuple | None = None) -> TrackArray:
+    """
+    Читает трек из CSV. Разделитель определяется автоматически; если
+    в первой строке есть названия столбцов широты и долготы, она считается
+    заголовком и столбцы ищутся по названиям (time/timestamp, date,
+    lat/latitude, lon/longitude). Без заголовка порядок столбцов —
+    время, широта, долгота.
+    """
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        sample = f.read(_CSV_SNIFF_SIZE)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t|")
+        except csv.Error:
+            dialect = csv.excel
+
+        reader = csv.reader(f, dialect)
+        first = next(csv.reader(io.StringIO(sample), dialect), [])
+        header = [title.strip().lower() for title in first]
+        lat_col = _find_column(header, _CSV_LAT_COLUMNS)
+        lon_col = _find_column(header, _CSV_LON_COLUMNS, exclude=(lat_col,))
+        date_col = None
+        if lat_col is not None and lon_col is not None:
+            # Первая строка — заголовок
+            next(reader, None)
+            time_col = _find_column(header, _CSV_TIME_COLUMNS)
+            date_col = _find_column(header, _CSV_DATE_COLUMNS, exclude=(time_col,))
+            if time_col is None:
+                time_col, date_col = date_col, None
+            elif header[time_col].startswith(_CSV_TIME_COLUMNS[:5]):
+                date_col = None  # столбец уже содержит дату и время
+            if time_col is None:
+                raise ValueError(f"В CSV не найден столбец времени: {path}")
+        else:
+            time_col, lat_col, lon_col = 0, 1, 2
+
+        columns = [time_col, lat_col, lon_col] + ([date_col] if date_col is not None else [])
+        width = max(columns) + 1
+        clocks, lats, lons, dates = [], [], [], []
+        point_count = 0
+        for row in reader:
+            if len(row) < width:
+                continue
+            point_count += 1
+            clocks.append(row[time_col].strip())
+            lats.append(row[lat_col].strip())
+            lons.append(row[lon_col].strip())
+            if date_col is not None:
+                dates.append(row[date_col].strip())
+
+    if not clocks:
+        return TrackArray.empty()
+    times = _csv_times(dates if date_col is not None else None, clocks)
+    if not np.isfinite(times).any():
+        raise ValueError(
+            f"В CSV не распознано время ни в одной строке (например, «{clocks[0]}»): {path}. "
+            f"Ожидается ISO 8601 (ГГГГ-ММ-ДДTЧЧ:ММ:СС[Z]) или секунды от эпохи Unix")
+    columns = _valid_rows(times, _signed_coordinates(lats), _signed_coordinates(lons),
+                          np.zeros(len(times), dtype=np.int32), time_window)
+    return TrackArray.from_columns(*columns, track_count=1, point_count=point_count)
+
+
+# ---------- KML ----------
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _open_kml(path: str):
+    """Поток KML; из .kmz берётся первый вложенный .kml"""
+    if not path.lower().endswith(".kmz"):
+        return open(path, "rb")
+    with zipfile.ZipFile(path) as zf:
+        names = [n for n in zf.namelist() if n.lower().endswith(".kml")]
+        if not names:
+            raise ValueError(f"В KMZ нет KML-файла: {path}")
+        return io.BytesIO(zf.read(names[0]))
+
+
+def read_kml_track(path: str, time_window: tuple | None = None) -> TrackArray:
+    """
+    Потоково читает треки <gx:Track> из KML/KMZ: пары <when>/<gx:coord>
+    собираются строками и переводятся в числа одной операцией.
+    Каждый gx:Track становится отдельным сегментом.
+    """
+    whens, coords, segments = [], [], []
+    segment_id = -1
+    track_count = 0
+    in_track = False
+
+    with _open_kml(path) as source:
+        for event, elem in ET.iterparse(source, events=("start", "end")):
+            name = _local_name(elem.tag)
+            if event == "start":
+                if name == "Track":
+                    segment_id += 1
+                    track_count += 1
+                    in_track = True
+                    track_whens, track_coords = [], []
+                continue
+            if not in_track:
+                if name == "Placemark":
+                    elem.clear()
+                continue
+            if name == "when":
+                track_whens.append(elem.text or "")
+            elif name == "coord":
+                track_coords.append(elem.text or "")
+            elif name == "Track":
+                in_track = False
+                # Точки без пары when/coord отбрасываются
+                n = min(len(track_whens), len(track_coords))
+                whens.extend(track_whens[:n])
+                coords.extend(track_coords[:n])
+                segments.extend([segment_id] * n)
+                elem.clear()
+
+    if not whens:
+        return TrackArray.empty()
+
+    times = parse_time_strings(whens)
+    # gx:coord — «долгота широта [высота]»
+    lon_lat = []
+    for c in coords:
+        pair = c.split()[:2]
+        lon_lat.extend(pair if len(pair) == 2 else ("nan", "nan"))
+    values = _to_floats(lon_lat).reshape(-1, 2)
+    columns = _valid_rows(times, values[:, 1], values[:, 0],
+                          np.array(segments, dtype=np.int32), time_window)
+    return TrackArray.from_columns(*columns, track_count=track_count,
+                                   point_count=len(whens))
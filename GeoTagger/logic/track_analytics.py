@@ -0,0 +1,91 @@
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from logic.track_array import TrackArray
+
+EARTH_RADIUS_M = 6371008.8
+
+# Скорость (м/с), ниже которой считаем, что стоим на месте (~1.8 км/ч)
+MOVING_SPEED_THRESHOLD = 0.5
+# Минимальная длительность остановки (сек)
+MIN_STOP_DURATION = 120
+
+
+@dataclass
+class Stop:
+    start: float      # секунды от эпохи, UTC
+    end: float
+    lat: float
+    lon: float
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+@dataclass
+class TrackMotion:
+    distance_m: float = 0.0
+    moving_time: float = 0.0
+    stopped_time: float = 0.0
+    max_speed: float = 0.0       # м/с
+    stops: list = field(default_factory=list)
+
+    @property
+    def avg_moving_speed(self) -> float:
+        return self.distance_m / self.moving_time if self.moving_time else 0.0
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Расстояние по большому кругу в метрах (работает с массивами)"""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + \
+        np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def segment_distances(track: TrackArray) -> np.ndarray:
+    """Длины отрезков между соседними точками (0 на стыке сегментов)"""
+    d = haversine(track.lats[:-1], track.lons[:-1],
+                  track.lats[1:], track.lons[1:])
+    d[track.segments[1:] != track.segments[:-1]] = 0.0
+    return d
+
+
+def analyze_track_motion(track: TrackArray,
+                         moving_threshold: float = MOVING_SPEED_THRESHOLD,
+                         min_stop: float = MIN_STOP_DURATION) -> TrackMotion:
+    """
+    Дистанция, скорость, время в движении/на месте и остановки.
+    Всё считается операциями над массивами, без цикла по точкам.
+    """
+    if len(track) < 2:
+        return TrackMotion()
+
+    same_segment = track.segments[1:] == track.segments[:-1]
+    dist = segment_distances(track)
+    dt = np.diff(track.times)
+    speed = np.divide(dist, dt, out=np.zeros_like(dist), where=dt > 0)
+
+    moving = same_segment & (speed >= moving_threshold)
+    stopped = same_segment & ~moving
+
+    motion = TrackMotion(
+        distance_m=float(dist.sum()),
+        moving_time=float(dt[moving].sum()),
+        stopped_time=float(dt[stopped].sum()),
+        max_speed=float(speed[same_segment].max()) if same_segment.any() else 0.0,
+    )
+
+    # Остановки — непрерывные серии «стоячих» отрезков длиннее min_stop
+    edges = np.diff(np.concatenate(([0], stopped.view(np.int8), [0])))
+    run_starts = np.flatnonzero(edges == 1)      # индекс первой точки серии
+    run_ends = np.flatnonzero(edges == -1)       # индекс последней точки
+    durations = track.times[run_ends] - track.times[run_starts]
+    for s, e in zip(run_starts[durations >= min_stop], run_ends[durations >= min_stop]):
+        motion.stops.append(Stop(
+            start=float(track.times[s]), end=float(track.times[e]),
+            lat=float(track.lats[s:e + 1].mean()),
+            lon=float(track.lons[s:e + 1].mean())))
+    return motion
@@ -0,0 +1,169 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+import numpy as np
+
+_EPOCH = datetime(1970, 1, 1)
+
+# Пауза записи (сек), через которую координаты не интерполируются
+DEFAULT_MAX_GAP = 600
+
+
+def to_epoch(dt: datetime) -> float:
+    """Переводит наивное UTC-время в секунды от эпохи"""
+    return (dt - _EPOCH).total_seconds()
+
+
+def from_epoch(seconds: float) -> datetime:
+    """Переводит секунды от эпохи в наивное UTC-время"""
+    return _EPOCH + timedelta(seconds=float(seconds))
+
+
+def to_epoch_array(timestamps) -> np.ndarray:
+    """Переводит последовательность datetime (или секунд) в массив float64"""
+    if isinstance(timestamps, np.ndarray) and timestamps.dtype != object:
+        return timestamps.astype(np.float64, copy=False)
+    return np.array([t if isinstance(t, (int, float)) else to_epoch(t)
+                     for t in timestamps], dtype=np.float64)
+
+
+@dataclass
+class TrackArray:
+    """
+    Колоночное представление трека: время (секунды от эпохи, UTC),
+    широта и долгота в массивах float64, номер сегмента (trkseg) int32.
+    Отсортирован по времени, точки с одинаковым временем удалены.
+
+    track_count и point_count — число треков и всех точек (включая
+    точки без времени) в исходном файле.
+    """
+    times: np.ndarray
+    lats: np.ndarray
+    lons: np.ndarray
+    segments: np.ndarray
+    track_count: int = 0
+    point_count: int = 0
+
+    @classmethod
+    def from_columns(cls, times, lats, lons, segments=None,
+                     track_count: int = 0, point_count: int | None = None) -> "TrackArray":
+        """Строит трек из столбцов: сортирует и убирает дубли по времени"""
+        times = np.asarray(times, dtype=np.float64)
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        if segments is None:
+            segments = np.zeros(times.size, dtype=np.int32)
+        segments = np.asarray(segments, dtype=np.int32)
+
+        if times.size > 1 and np.any(np.diff(times) <= 0):
+            order = np.argsort(times, kind="stable")
+            times, lats, lons = times[order], lats[order], lons[order]
+            segments = segments[order]
+            keep = np.empty(times.size, dtype=bool)
+            keep[0] = True
+            np.not_equal(times[1:], times[:-1], out=keep[1:])
+            if not keep.all():
+                times, lats, lons = times[keep], lats[keep], lons[keep]
+                segments = segments[keep]
+
+        if point_count is None:
+            point_count = int(times.size)
+        return cls(times=times, lats=lats, lons=lons, segments=segments,
+                   track_count=track_count, point_count=point_count)
+
+    @classmethod
+    def empty(cls) -> "TrackArray":
+        return cls.from_columns([], [], [])
+
+    def __len__(self):
+        return int(self.times.size)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.times.nbytes + self.lats.nbytes + self.lons.nbytes
+                   + self.segments.nbytes)
+
+    @property
+    def segment_count(self) -> int:
+        if self.segments.size == 0:
+            return 0
+        return int(np.count_nonzero(np.bincount(self.segments)))
+
+    def slice_time(self, start: float, end: float) -> "TrackArray":
+        """Часть трека в окне [start, end] (секунды от эпохи) без копирования"""
+        lo = int(np.searchsorted(self.times, start, side="left"))
+        hi = int(np.searchsorted(self.times, end, side="right"))
+        return TrackArray(self.times[lo:hi], self.lats[lo:hi],
+                          self.lons[lo:hi], self.segments[lo:hi],
+                          self.track_count, self.point_count)
+
+    def time_at(self, i: int) -> datetime:
+        """Время i-й точки как наивный UTC datetime"""
+        return from_epoch(self.times[i])
+
+
+def _covered_runs(track: TrackArray, max_gap: float | None) -> tuple:
+    """
+    Интервалы времени, действительно покрытые треком: участки между
+    разрывами (смена сегмента или пауза дольше max_gap)
+    """
+    breaks = track.segments[1:] != track.segments[:-1]
+    if max_gap is not None:
+        breaks |= np.diff(track.times) > max_gap
+    cuts = np.flatnonzero(breaks)
+    starts = track.times[np.concatenate(([0], cuts + 1))]
+    ends = track.times[np.concatenate((cuts, [len(track) - 1]))]
+    return starts, ends
+
+
+def merge_tracks(tracks: list, max_gap: float | None = DEFAULT_MAX_GAP) -> TrackArray:
+    """
+    Сливает несколько треков в один упорядоченный по времени.
+
+    Сегменты разных файлов не пересекаются по номерам, поэтому между
+    файлами координаты не интерполируются. Если файлы перекрываются
+    по времени, на перекрытии остаются точки трека, начавшегося раньше:
+    точки более позднего на участках, покрытых ранним, отбрасываются,
+    а не чередуются (иначе каждая пара соседних точек стала бы
+    разрывом). Разрывы и паузы раннего трека (дольше max_gap) заполняются
+    точками позднего.
+    """
+    tracks = sorted((t for t in tracks if len(t)), key=lambda t: t.times[0])
+    if not tracks:
+        return TrackArray.empty()
+    if len(tracks) == 1:
+        return tracks[0]
+
+    kept = []
+    covered = []  # покрытые участки уже взятых треков: (начала, концы)
+    for t in tracks:
+        mask = np.ones(len(t), dtype=bool)
+        for starts, ends in covered:
+            run = np.searchsorted(starts, t.times, side="right") - 1
+            inside = run >= 0
+            inside[inside] = t.times[inside] <= ends[run[inside]]
+            mask &= ~inside
+        if not mask.all():
+            t = TrackArray(t.times[mask], t.lats[mask], t.lons[mask], t.segments[mask],
+                           t.track_count, t.point_count)
+        if len(t):
+            kept.append(t)
+            covered.append(_covered_runs(t, max_gap))
+    tracks = kept
+
+    segments = []
+    segment_base = 0
+    for t in tracks:
+        segments.append(t.segments.astype(np.int32) + segment_base)
+        segment_base += int(t.segments.max()) + 1
+
+    # Каждый трек — уже отсортированная серия; если треки не перекрываются,
+    # конкатенация по времени начала уже упорядочена, иначе стабильная
+    # сортировка (timsort) сливает k готовых серий за O(N log k)
+    return TrackArray.from_columns(
+        np.concatenate([t.times for t in tracks]),
+        np.concatenate([t.lats for t in tracks]),
+        np.concatenate([t.lons for t in tracks]),
+        np.concatenate(segments),
+        track_count=sum(t.track_count for t in tracks),
+        point_count=sum(t.point_count for t in tracks))
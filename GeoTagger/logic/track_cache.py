@@ -0,0 +1,136 @@
+import os
+import threading
+from collections import OrderedDict
+
+from logic.logger import get_logger
+from logic.track_array import TrackArray, merge_tracks
+from logic.track_reader import is_track_file, load_track_file
+from logic.track_disk_cache import load_cached_track, save_cached_track
+from logic.track_simplify import simplify_track
+from logic.track_index import TrackIndex, build_track_index, DEFAULT_MAX_GAP
+
+logger = get_logger()
+
+# Сколько разобранных треков держать в памяти процесса
+MAX_CACHED_TRACKS = 4
+
+_tracks = OrderedDict()   # ключ файла -> TrackArray
+_indexes = {}             # (ключ файла, max_gap, допуск) -> TrackIndex
+_lock = threading.RLock()
+
+
+def _file_key(path: str) -> tuple:
+    """Ключ кэша: путь, время изменения и размер файла"""
+    st = os.stat(path)
+    return os.path.abspath(path), st.st_mtime_ns, st.st_size
+
+
+def resolve_track_paths(source) -> list:
+    """
+    Разворачивает источник трека в список файлов.
+
+    Args:
+        source: Путь к файлу трека (GPX, в том числе сжатый, или FIT), папке
+            с такими файлами или список таких путей
+    """
+    items = [source] if isinstance(source, (str, os.PathLike)) else list(source)
+    paths = []
+    for item in items:
+        if os.path.isdir(item):
+            paths.extend(sorted(
+                os.path.join(item, f) for f in os.listdir(item)
+                if is_track_file(f)))
+        else:
+            paths.append(item)
+    return paths
+
+
+def _load_file(path: str) -> TrackArray:
+    track, content_hash = load_cached_track(path)
+    if track is None:
+        track = load_track_file(path)
+        save_cached_track(path, track, content_hash)
+    return track
+
+
+def get_track(source) -> TrackArray:
+    """
+    Возвращает разобранный трек, читая файлы только при первом обращении.
+    Несколько файлов сливаются в один трек, упорядоченный по времени.
+    """
+    paths = resolve_track_paths(source)
+    if not paths:
+        raise ValueError("Не выбран ни один GPX-файл")
+    key = tuple(_file_key(p) for p in paths)
+    with _lock:
+        track = _tracks.get(key)
+        if track is not None:
+            _tracks.move_to_end(key)
+            return track
+
+        if len(paths) == 1:
+            track = _load_file(paths[0])
+        else:
+            track = merge_tracks([_load_file(p) for p in paths])
+            logger.info(
+                f"Объединено GPX-файлов: {len(paths)}, точек: {len(track)}")
+        _tracks[key] = track
+        while len(_tracks) > MAX_CACHED_TRACKS:
+            old_key, _ = _tracks.popitem(last=False)
+            for index_key in [k for k in _indexes if k[0] == old_key]:
+                del _indexes[index_key]
+        return track
+
+
+def get_track_index(source, max_gap: float | None = DEFAULT_MAX_GAP,
+                    simplify_tolerance: float | None = None) -> TrackIndex:
+    """
+    Возвращает индекс трека, строя его один раз на набор файлов, max_gap
+    и допуск упрощения (метры, None — без упрощения)
+    """
+    track = get_track(source)
+    key = (tuple(_file_key(p) for p in resolve_track_paths(source)),
+           max_gap, simplify_tolerance)
+    with _lock:
+        index = _indexes.get(key)
+        if index is None:
+            if simplify_tolerance:
+                track = simplify_track(track, simplify_tolerance, max_gap)
+            index = build_track_index(track, max_gap)
+            _indexes[key] = index
+        return index
+
+
+def get_track_window(source, start: float, end: float) -> TrackArray:
+    """
+    Трек только в окне времени [start, end] (секунды от эпохи).
+
+    Уже разобранный трек (в памяти или в дисковом кэше) просто
+    обрезается; иначе файл читается потоково с отбрасыванием точек вне
+    окна. Обрезанный трек в кэш не попадает.
+    """
+    paths = resolve_track_paths(source)
+    if not paths:
+        raise ValueError("Не выбран ни один GPX-файл")
+    key = tuple(_file_key(p) for p in paths)
+    with _lock:
+        track = _tracks.get(key)
+    if track is not None:
+        return track.slice_time(start, end)
+
+    parts = []
+    for path in paths:
+        cached, _ = load_cached_track(path)
+        if cached is not None:
+            parts.append(cached.slice_time(start, end))
+        else:
+            parts.append(load_track_file(path, (start, end)))
+    track = merge_tracks(parts)
+    logger.info(f"Загружен участок трека: {len(track)} точек")
+    return track
+
+
+def clear_track_cache():
+    with _lock:
+        _tracks.clear()
+        _indexes.clear()
@@ -0,0 +1,195 @@
+import hashlib
+import json
+import os
+import struct
+import threading
+
+import numpy as np
+
+from logic.config import get_user_cache_dir
+from logic.logger import get_logger
+from logic.track_array import TrackArray
+
+logger = get_logger()
+
+# Файлы меньше этого размера разбираются быстрее, чем ищутся в кэше
+MIN_CACHED_FILE_SIZE = 1024 * 1024
+# Предельный размер кэша на диске
+MAX_CACHE_BYTES = 1024 * 1024 * 1024
+
+_MAGIC = b"GTTRK\x00\x00\x01"
+_ALIGN = 64
+_INDEX_FILE = "index.json"
+# Порядок и типы массивов в файле кэша
+_COLUMNS = (("times", np.float64), ("lats", np.float64),
+            ("lons", np.float64), ("segments", np.int32))
+
+_lock = threading.Lock()
+
+
+def _cache_dir() -> str:
+    path = os.path.join(get_user_cache_dir(), "tracks")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _fast_key(path: str) -> str:
+    st = os.stat(path)
+    return f"{os.path.abspath(path)}|{st.st_mtime_ns}|{st.st_size}"
+
+
+def file_content_hash(path: str) -> str:
+    """BLAKE2b-хэш содержимого файла"""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _load_index(cache_dir: str) -> dict:
+    try:
+        with open(os.path.join(cache_dir, _INDEX_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def _save_index(cache_dir: str, index: dict):
+    tmp = os.path.join(cache_dir, _INDEX_FILE + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(index, f)
+    os.replace(tmp, os.path.join(cache_dir, _INDEX_FILE))
+
+
+def load_cached_track(path: str) -> tuple:
+    """
+    Ищет трек в дисковом кэше: сначала по пути, времени изменения
+    и размеру, затем по хэшу содержимого. Массивы отображаются
+    в память (memmap) без чтения и разбора исходного файла.
+
+    Returns:
+        (трек или None, хэш содержимого или None) — хэш передаётся
+        в save_cached_track, чтобы не читать файл повторно
+    """
+    if os.path.getsize(path) < MIN_CACHED_FILE_SIZE:
+        return None, None
+    content_hash = None
+    try:
+        cache_dir = _cache_dir()
+        with _lock:
+            index = _load_index(cache_dir)
+        fast_key = _fast_key(path)
+        content_hash = index.get(fast_key)
+        if content_hash is None:
+            content_hash = file_content_hash(path)
+        entry = os.path.join(cache_dir, f"{content_hash}.trk")
+        if not os.path.exists(entry):
+            return None, content_hash
+
+        track = _read_entry(entry)
+        os.utime(entry)  # отметка для вытеснения по LRU
+        if index.get(fast_key) != content_hash:
+            with _lock:
+                index = _load_index(cache_dir)
+                index[fast_key] = content_hash
+                _save_index(cache_dir, index)
+        logger.info(
+            f"Трек загружен из дискового кэша: {os.path.basename(path)}")
+        return track, content_hash
+    except Exception as e:
+        logger.warning(f"Не удалось прочитать кэш трека: {e}")
+        return None, content_hash
+
+
+def save_cached_track(path: str, track: TrackArray, content_hash: str | None = None):
+    """Сохраняет разобранный трек в дисковый кэш (хэш — из load_cached_track)"""
+    if os.path.getsize(path) < MIN_CACHED_FILE_SIZE:
+        return
+    try:
+        cache_dir = _cache_dir()
+        fast_key = _fast_key(path)
+        if content_hash is None:
+            content_hash = file_content_hash(path)
+        entry = os.path.join(cache_dir, f"{content_hash}.trk")
+        if not os.path.exists(entry):
+            _write_entry(entry, track, {"source": os.path.abspath(path)})
+        with _lock:
+            index = _load_index(cache_dir)
+            index[fast_key] = content_hash
+            _save_index(cache_dir, index)
+            _evict(cache_dir, index)
+    except Exception as e:
+        logger.warning(f"Не удалось сохранить кэш трека: {e}")
+
+
+def _write_entry(entry: str, track: TrackArray, extra: dict):
+    """Формат: magic, длина заголовка, JSON-заголовок, выровненные массивы"""
+    header = dict(extra, n=len(track), track_count=track.track_count,
+                  point_count=track.point_count)
+    header_bytes = json.dumps(header).encode("utf-8")
+    offset = len(_MAGIC) + 4 + len(header_bytes)
+    padding = (-offset) % _ALIGN
+
+    tmp = entry + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_MAGIC)
+        f.write(struct.pack("<I", len(header_bytes)))
+        f.write(header_bytes)
+        f.write(b"\0" * padding)
+        for name, dtype in _COLUMNS:
+            column = np.ascontiguousarray(getattr(track, name), dtype=dtype)
+            f.write(column.tobytes())
+            f.write(b"\0" * ((-column.nbytes) % _ALIGN))
+    os.replace(tmp, entry)
+
+
+def _read_entry(entry: str) -> TrackArray:
+    with open(entry, "rb") as f:
+        if f.read(len(_MAGIC)) != _MAGIC:
+            raise ValueError("неизвестный формат кэша")
+        (header_len,) = struct.unpack("<I", f.read(4))
+        header = json.loads(f.read(header_len).decode("utf-8"))
+
+    n = header["n"]
+    offset = len(_MAGIC) + 4 + header_len
+    offset += (-offset) % _ALIGN
+    columns = {}
+    for name, dtype in _COLUMNS:
+        nbytes = n * np.dtype(dtype).itemsize
+        columns[name] = np.memmap(entry, dtype=dtype, mode="r",
+                                  offset=offset, shape=(n,)) if n else \
+            np.empty(0, dtype=dtype)
+        offset += nbytes + (-nbytes) % _ALIGN
+
+    # Данные в кэше уже отсортированы и очищены от дублей
+    return TrackArray(track_count=header["track_count"],
+                      point_count=header["point_count"], **columns)
+
+
+def _evict(cache_dir: str, index: dict):
+    """Удаляет давно не использованные записи сверх MAX_CACHE_BYTES"""
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.endswith(".trk"):
+            full = os.path.join(cache_dir, name)
+            st = os.stat(full)
+            entries.append((st.st_mtime, st.st_size, full))
+
+    total = sum(size for _, size, _ in entries)
+    removed = set()
+    for _, size, full in sorted(entries):
+        if total <= MAX_CACHE_BYTES:
+            break
+        try:
+            os.remove(full)
+        except OSError:
+            continue  # файл ещё отображён в память
+        total -= size
+        removed.add(os.path.basename(full)[:-len(".trk")])
+
+    if removed:
+        for key in [k for k, v in index.items() if v in removed]:
+            del index[key]
+        _save_index(cache_dir, index)
+        logger.info(f"Кэш треков: удалено записей — {len(removed)}")
@@ -0,0 +1,118 @@
+from datetime import datetime
+
+import numpy as np
+
+from logic.logger import get_logger
+from logic.track_array import DEFAULT_MAX_GAP, TrackArray, to_epoch_array
+
+logger = get_logger()
+
+# Максимальное расхождение (сек) для использования ближайшей точки
+NEAREST_POINT_LIMIT = 3600
+
+# Статусы пакетного сопоставления
+STATUS_MATCHED = 0  # координаты интерполированы
+STATUS_NEAREST = 1  # использована ближайшая точка
+STATUS_MISS = 2     # координаты не найдены
+
+
+class TrackIndex:
+    """
+    Индекс трека по времени: строится один раз и позволяет находить
+    координаты для момента съёмки бинарным поиском.
+
+    Интерполяция не выполняется между сегментами трека и через паузы
+    записи длиннее max_gap секунд — в этих случаях, как и за пределами
+    трека, используется ближайшая точка (если она не дальше
+    NEAREST_POINT_LIMIT).
+    """
+
+    def __init__(self, track: TrackArray, max_gap: float | None = DEFAULT_MAX_GAP,
+                 breaks: np.ndarray | None = None):
+        self.track = track
+        self.max_gap = max_gap
+
+        # breaks[i] — нельзя интерполировать между точками i и i + 1;
+        # готовую маску передаёт индекс, подключённый из разделяемой памяти
+        if breaks is not None:
+            self.breaks = breaks
+            return
+        times = track.times
+        self.breaks = track.segments[1:] != track.segments[:-1]
+        if max_gap is not None:
+            self.breaks |= np.diff(times) > max_gap
+
+    def __len__(self):
+        return len(self.track)
+
+    def find(self, timestamp: datetime):
+        """Возвращает (lat, lon) для момента времени или (None, None)"""
+        lats, lons, status = self.match_many([timestamp])
+        if status[0] == STATUS_MISS:
+            return None, None
+        if status[0] == STATUS_NEAREST:
+            logger.warning("Использована ближайшая точка")
+        return float(lats[0]), float(lons[0])
+
+    def match_many(self, timestamps):
+        """
+        Пакетное сопоставление: один проход searchsorted + интерполяция.
+
+        Args:
+            timestamps: datetime или секунды от эпохи (исправленное время)
+
+        Returns:
+            (lats, lons, status): массивы float64 (NaN для промахов)
+            и массив статусов STATUS_*
+        """
+        ts = to_epoch_array(timestamps)
+        lats = np.full(ts.shape, np.nan)
+        lons = np.full(ts.shape, np.nan)
+        status = np.full(ts.shape, STATUS_MISS, dtype=np.int8)
+
+        epochs = self.track.times
+        lat_array = self.track.lats
+        lon_array = self.track.lons
+        n = len(epochs)
+        if n == 0 or ts.size == 0:
+            return lats, lons, status
+
+        pos = np.searchsorted(epochs, ts, side="left")
+        hi = np.minimum(pos, n - 1)
+        lo = np.maximum(pos - 1, 0)
+
+        # Точное совпадение с точкой трека
+        exact = epochs[hi] == ts
+        lats[exact] = lat_array[hi[exact]]
+        lons[exact] = lon_array[hi[exact]]
+        status[exact] = STATUS_MATCHED
+
+        # Интерполяция внутри отрезка без разрыва
+        inner = (pos > 0) & (pos < n) & ~exact
+        inner[inner] = ~self.breaks[lo[inner]]
+        l, h = lo[inner], hi[inner]
+        factor = (ts[inner] - epochs[l]) / (epochs[h] - epochs[l])
+        lats[inner] = lat_array[l] + (lat_array[h] - lat_array[l]) * factor
+        lons[inner] = lon_array[l] + (lon_array[h] - lon_array[l]) * factor
+        status[inner] = STATUS_MATCHED
+
+        # Вне трека или в разрыве — ближайшая из соседних точек
+        rest = np.flatnonzero(status == STATUS_MISS)
+        l, h = lo[rest], hi[rest]
+        dist_lo = np.abs(ts[rest] - epochs[l])
+        dist_hi = np.abs(epochs[h] - ts[rest])
+        nearest = np.where(dist_lo <= dist_hi, l, h)
+        close = np.minimum(dist_lo, dist_hi) < NEAREST_POINT_LIMIT
+        idx = rest[close]
+        lats[idx] = lat_array[nearest[close]]
+        lons[idx] = lon_array[nearest[close]]
+        status[idx] = STATUS_NEAREST
+        return lats, lons, status
+
+
+def build_track_index(track: TrackArray, max_gap: float | None = DEFAULT_MAX_GAP) -> TrackIndex:
+    index = TrackIndex(track, max_gap)
+    logger.info(
+        f"Построен индекс трека: {len(index)} точек, "
+        f"разрывов: {int(index.breaks.sum())}")
+    return index
@@ -0,0 +1,103 @@
+import hashlib
+import os
+import sqlite3
+from contextlib import closing
+
+from logic.config import get_user_cache_dir
+from logic.logger import get_logger
+from logic.track_reader import is_track_file, load_track_file
+from logic.track_stats import compute_track_stats
+
+logger = get_logger()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracks (
+    path       TEXT PRIMARY KEY,
+    mtime_ns   INTEGER NOT NULL,
+    size       INTEGER NOT NULL,
+    start_time REAL,
+    end_time   REAL,
+    min_lat    REAL,
+    max_lat    REAL,
+    min_lon    REAL,
+    max_lon    REAL,
+    points     INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tracks_time ON tracks (start_time, end_time);
+"""
+
+
+class TrackLibrary:
+    """
+    Архив GPX-файлов с индексом в SQLite: для каждого файла хранятся
+    интервал времени и охват. При геотеггинге разбираются только те
+    файлы, интервалы которых пересекаются со временем снимков.
+    """
+
+    def __init__(self, archive_dir: str, db_path: str | None = None):
+        self.archive_dir = os.path.abspath(archive_dir)
+        if db_path is None:
+            name = hashlib.sha1(self.archive_dir.encode("utf-8")).hexdigest()[:16]
+            db_path = os.path.join(get_user_cache_dir(), f"library_{name}.sqlite")
+        self.db_path = db_path
+        with closing(self._connect()) as conn, conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # Соединение на вызов: библиотека используется из разных потоков
+        return sqlite3.connect(self.db_path)
+
+    def _scan_files(self) -> dict:
+        files = {}
+        for root, _, names in os.walk(self.archive_dir):
+            for name in names:
+                if is_track_file(name):
+                    path = os.path.join(root, name)
+                    st = os.stat(path)
+                    files[path] = (st.st_mtime_ns, st.st_size)
+        return files
+
+    def refresh(self) -> int:
+        """Обновляет индекс: новые и изменённые файлы разбираются заново"""
+        files = self._scan_files()
+        with closing(self._connect()) as conn, conn:
+            known = {path: (mtime, size) for path, mtime, size in
+                     conn.execute("SELECT path, mtime_ns, size FROM tracks")}
+
+            removed = [p for p in known if p not in files]
+            conn.executemany("DELETE FROM tracks WHERE path = ?",
+                             [(p,) for p in removed])
+
+            changed = [p for p, stamp in files.items() if known.get(p) != stamp]
+            for path in changed:
+                conn.execute(
+                    "INSERT OR REPLACE INTO tracks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (path, *files[path], *self._describe(path)))
+
+        if changed or removed:
+            logger.info(
+                f"Архив GPX: проиндексировано {len(changed)}, удалено {len(removed)}, "
+                f"всего файлов {len(files)}")
+        return len(changed)
+
+    @staticmethod
+    def _describe(path: str) -> tuple:
+        """(start, end, min_lat, max_lat, min_lon, max_lon, points)"""
+        try:
+            track = load_track_file(path)
+        except Exception as e:
+            logger.warning(f"Архив GPX: не удалось разобрать {path}: {e}")
+            return (None,) * 6 + (0,)
+        if not track:
+            return (None,) * 6 + (0,)
+        stats = compute_track_stats(track)
+        return (stats.start, stats.end, stats.min_lat, stats.max_lat,
+                stats.min_lon, stats.max_lon, stats.points_with_time)
+
+    def find_tracks(self, start: float, end: float) -> list:
+        """Файлы, интервал времени которых пересекается с [start, end]"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT path FROM tracks WHERE points > 0 AND start_time <= ? AND end_time >= ? "
+                "ORDER BY start_time", (end, start)).fetchall()
+        return [path for (path,) in rows]
@@ -0,0 +1,45 @@
+from logic.fit_reader import FIT_FILE_EXTENSIONS, read_fit_track
+from logic.gpx_reader import GPX_FILE_EXTENSIONS, load_gpx_track, probe_gpx
+from logic.text_track_reader import (
+    CSV_FILE_EXTENSIONS, KML_FILE_EXTENSIONS, NMEA_FILE_EXTENSIONS,
+    read_csv_track, read_kml_track, read_nmea_track
+)
+from logic.track_array import TrackArray
+
+# Читатели форматов, кроме GPX: расширения -> функция (путь, окно времени)
+_READERS = (
+    (FIT_FILE_EXTENSIONS, read_fit_track),
+    (NMEA_FILE_EXTENSIONS, read_nmea_track),
+    (CSV_FILE_EXTENSIONS, read_csv_track),
+    (KML_FILE_EXTENSIONS, read_kml_track),
+)
+
+# Все поддерживаемые форматы файлов треков
+TRACK_FILE_EXTENSIONS = GPX_FILE_EXTENSIONS + tuple(
+    ext for extensions, _ in _READERS for ext in extensions)
+
+
+def is_track_file(path: str) -> bool:
+    return path.lower().endswith(TRACK_FILE_EXTENSIONS)
+
+
+def load_track_file(path: str, time_window: tuple | None = None) -> TrackArray:
+    """Читает файл трека любого поддерживаемого формата в TrackArray"""
+    for extensions, reader in _READERS:
+        if path.lower().endswith(extensions):
+            return reader(path, time_window)
+    return load_gpx_track(path, time_window)
+
+
+def probe_track_file(path: str) -> dict | None:
+    """
+    Быстрая проба начала/конца трека. Файлы, кроме GPX, читаются целиком:
+    FIT компактен, а текстовые журналы логгеров невелики.
+    """
+    if not path.lower().endswith(GPX_FILE_EXTENSIONS):
+        track = load_track_file(path)
+        if not track:
+            return None
+        return {"start": float(track.times[0]), "end": float(track.times[-1]),
+                "start_lat": float(track.lats[0]), "start_lon": float(track.lons[0])}
+    return probe_gpx(path)
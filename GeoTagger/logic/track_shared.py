@@ -0,0 +1,131 @@
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from logic.track_array import TrackArray
+from logic.track_index import TrackIndex
+
+_ALIGN = 64
+# Порядок и типы массивов в блоке разделяемой памяти
+_COLUMNS = (("times", np.float64), ("lats", np.float64),
+            ("lons", np.float64), ("segments", np.int32))
+
+# Индексы, уже подключённые в этом процессе: имя блока -> (память, индекс)
+_attached = {}
+# Индекс трека рабочего процесса пула (см. shared_track_pool)
+_worker_index = None
+
+
+@dataclass(frozen=True)
+class SharedTrackHandle:
+    """Описание опубликованного индекса; передаётся в рабочие процессы"""
+    name: str
+    n: int
+    max_gap: float | None
+    track_count: int
+    point_count: int
+
+
+def _layout(n: int) -> tuple:
+    """Смещения массивов (включая маску разрывов) и общий размер блока"""
+    offsets = {}
+    offset = 0
+    for name, dtype in _COLUMNS + (("breaks", np.bool_),):
+        offsets[name] = offset
+        length = n - 1 if name == "breaks" else n
+        nbytes = max(length, 0) * np.dtype(dtype).itemsize
+        offset += nbytes + (-nbytes) % _ALIGN
+    return offsets, max(offset, 1)
+
+
+def _views(buf, n: int) -> dict:
+    offsets, _ = _layout(n)
+    views = {}
+    for name, dtype in _COLUMNS + (("breaks", np.bool_),):
+        length = max(n - 1, 0) if name == "breaks" else n
+        views[name] = np.ndarray((length,), dtype=dtype, buffer=buf,
+                                 offset=offsets[name])
+    return views
+
+
+class SharedTrackIndex:
+    """
+    Индекс трека, опубликованный в multiprocessing.shared_memory одним
+    блоком плоских массивов. Рабочие процессы подключаются к нему по
+    handle без копирования и без повторного разбора GPX.
+
+    Блок существует, пока объект не закрыт (close или выход из with).
+    """
+
+    def __init__(self, index: TrackIndex):
+        track = index.track
+        n = len(track)
+        _, size = _layout(n)
+        self._shm = shared_memory.SharedMemory(create=True, size=size)
+        views = _views(self._shm.buf, n)
+        for name, _ in _COLUMNS:
+            views[name][:] = getattr(track, name)
+        views["breaks"][:] = index.breaks
+        self.handle = SharedTrackHandle(self._shm.name, n, index.max_gap,
+                                        track.track_count, track.point_count)
+
+    def close(self):
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def attach_track_index(handle: SharedTrackHandle) -> TrackIndex:
+    """
+    Подключает опубликованный индекс: массивы TrackIndex — представления
+    разделяемой памяти, данные не копируются. Повторные вызовы в том же
+    процессе возвращают уже подключённый индекс.
+    """
+    cached = _attached.get(handle.name)
+    if cached is not None:
+        return cached[1]
+
+    shm = shared_memory.SharedMemory(name=handle.name)
+    views = _views(shm.buf, handle.n)
+    for view in views.values():
+        view.flags.writeable = False
+    track = TrackArray(views["times"], views["lats"], views["lons"],
+                       views["segments"], handle.track_count, handle.point_count)
+    index = TrackIndex(track, handle.max_gap, breaks=views["breaks"])
+    # Память держится открытой, пока жив процесс
+    _attached[handle.name] = (shm, index)
+    return index
+
+
+def _init_worker(handle: SharedTrackHandle):
+    global _worker_index
+    _worker_index = attach_track_index(handle)
+
+
+def worker_track_index() -> TrackIndex:
+    """Индекс трека в рабочем процессе пула shared_track_pool"""
+    if _worker_index is None:
+        raise RuntimeError("Индекс трека не подключён: процесс не из shared_track_pool")
+    return _worker_index
+
+
+@contextmanager
+def shared_track_pool(index: TrackIndex, workers: int | None = None):
+    """
+    Пул процессов, в каждом из которых индекс трека уже подключён
+    (доступен через worker_track_index). Трек публикуется один раз на пул.
+    """
+    with SharedTrackIndex(index) as shared, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                initargs=(shared.handle,)) as pool:
+        yield pool
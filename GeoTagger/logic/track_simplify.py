@@ -0,0 +1,90 @@
+import numpy as np
+
+from logic.logger import get_logger
+from logic.track_analytics import EARTH_RADIUS_M
+from logic.track_array import TrackArray
+from logic.track_index import DEFAULT_MAX_GAP
+
+logger = get_logger()
+
+
+def _sed_errors(times, x, y, a: int, b: int) -> np.ndarray:
+    """
+    Отклонение точек (a, b) от положения, интерполированного по времени
+    между a и b (synchronized Euclidean distance), в метрах.
+    """
+    t = times[a + 1:b]
+    f = (t - times[a]) / (times[b] - times[a])
+    dx = x[a + 1:b] - (x[a] + (x[b] - x[a]) * f)
+    dy = y[a + 1:b] - (y[a] + (y[b] - y[a]) * f)
+    return np.hypot(dx, dy)
+
+
+def _simplify_run(times, x, y, start: int, end: int, tolerance: float,
+                  max_gap: float | None, keep: np.ndarray):
+    """Дуглас-Пекер по времени для непрерывного участка [start, end]"""
+    stack = [(start, end)]
+    while stack:
+        a, b = stack.pop()
+        if b - a < 2:
+            continue
+        errors = _sed_errors(times, x, y, a, b)
+        k = int(errors.argmax())
+        too_long = max_gap is not None and times[b] - times[a] > max_gap
+        if errors[k] <= tolerance and not too_long:
+            continue
+        if errors[k] <= tolerance:
+            # Точность соблюдена, но отрезок длиннее max_gap — делим по времени,
+            # иначе индекс откажется интерполировать внутри него
+            mid = (times[a] + times[b]) / 2
+            k = int(np.searchsorted(times[a + 1:b], mid))
+            k = min(max(k, 0), b - a - 2)
+        split = a + 1 + k
+        keep[split] = True
+        stack.append((a, split))
+        stack.append((split, b))
+
+
+def simplify_track(track: TrackArray, tolerance_m: float,
+                   max_gap: float | None = DEFAULT_MAX_GAP) -> TrackArray:
+    """
+    Прореживает трек: убирает точки, без которых положение, интерполированное
+    по времени, отклоняется от исходного не больше чем на tolerance_m метров.
+
+    Поскольку координата снимка интерполируется между соседними точками,
+    а ошибка линейна внутри отрезка, позиции снимков тоже остаются в
+    пределах допуска. Границы сегментов и паузы длиннее max_gap сохраняются,
+    новые паузы длиннее max_gap не создаются.
+    """
+    n = len(track)
+    if n < 3 or tolerance_m <= 0:
+        return track
+
+    # Локальная равнопромежуточная проекция в метрах
+    lat0 = np.radians(float(np.median(track.lats)))
+    x = np.radians(track.lons) * EARTH_RADIUS_M * np.cos(lat0)
+    y = np.radians(track.lats) * EARTH_RADIUS_M
+    times = track.times
+
+    # Участки без разрывов: сегменты, разделённые длинными паузами
+    breaks = track.segments[1:] != track.segments[:-1]
+    if max_gap is not None:
+        breaks |= np.diff(times) > max_gap
+    run_ends = np.flatnonzero(breaks)
+    run_starts = np.concatenate(([0], run_ends + 1))
+    run_ends = np.concatenate((run_ends, [n - 1]))
+
+    keep = np.zeros(n, dtype=bool)
+    keep[run_starts] = True
+    keep[run_ends] = True
+    for start, end in zip(run_starts, run_ends):
+        _simplify_run(times, x, y, int(start), int(end),
+                      tolerance_m, max_gap, keep)
+
+    simplified = TrackArray(track.times[keep], track.lats[keep],
+                            track.lons[keep], track.segments[keep],
+                            track.track_count, track.point_count)
+    logger.info(
+        f"Трек упрощён: {n} → {len(simplified)} точек "
+        f"(допуск {tolerance_m:g} м)")
+    return simplified
@@ -0,0 +1,85 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from logic.track_array import TrackArray
+
+# Размер блока: четыре столбца блока помещаются в кэш процессора,
+# поэтому все показатели блока считаются за одно чтение из памяти
+STATS_BLOCK_SIZE = 64 * 1024
+
+
+@dataclass
+class TrackStats:
+    track_count: int = 0
+    segment_count: int = 0
+    point_count: int = 0
+    points_with_time: int = 0
+    start: float | None = None
+    end: float | None = None
+    min_lat: float | None = None
+    max_lat: float | None = None
+    min_lon: float | None = None
+    max_lon: float | None = None
+
+    @property
+    def duration(self) -> float:
+        if self.start is None:
+            return 0.0
+        return self.end - self.start
+
+
+class TrackStatsAccumulator:
+    """
+    Накопитель статистики трека за один проход: блоки точек подаются
+    по порядку, промежуточные значения хранятся в нескольких скалярах.
+    """
+
+    def __init__(self):
+        self.stats = TrackStats()
+        self._seen_segments = np.zeros(0, dtype=bool)
+
+    def update(self, times, lats, lons, segments):
+        n = len(times)
+        if n == 0:
+            return
+        s = self.stats
+        s.points_with_time += n
+
+        t_min, t_max = float(times.min()), float(times.max())
+        s.start = t_min if s.start is None else min(s.start, t_min)
+        s.end = t_max if s.end is None else max(s.end, t_max)
+
+        lat_min, lat_max = float(lats.min()), float(lats.max())
+        lon_min, lon_max = float(lons.min()), float(lons.max())
+        if s.min_lat is None:
+            s.min_lat, s.max_lat = lat_min, lat_max
+            s.min_lon, s.max_lon = lon_min, lon_max
+        else:
+            s.min_lat, s.max_lat = min(s.min_lat, lat_min), max(s.max_lat, lat_max)
+            s.min_lon, s.max_lon = min(s.min_lon, lon_min), max(s.max_lon, lon_max)
+
+        # Номера сегментов плотные (0..K), поэтому хватает битовой маски
+        top = int(segments.max()) + 1
+        if top > self._seen_segments.size:
+            grown = np.zeros(top, dtype=bool)
+            grown[:self._seen_segments.size] = self._seen_segments
+            self._seen_segments = grown
+        self._seen_segments[segments] = True
+
+    def result(self, track_count: int = 0, point_count: int | None = None) -> TrackStats:
+        s = self.stats
+        s.segment_count = int(np.count_nonzero(self._seen_segments))
+        s.track_count = track_count
+        s.point_count = s.points_with_time if point_count is None else point_count
+        return s
+
+
+def compute_track_stats(track: TrackArray) -> TrackStats:
+    """Считает статистику трека одним линейным проходом по блокам"""
+    acc = TrackStatsAccumulator()
+    for i in range(0, len(track), STATS_BLOCK_SIZE):
+        block = slice(i, i + STATS_BLOCK_SIZE)
+        acc.update(track.times[block], track.lats[block],
+                   track.lons[block], track.segments[block])
+    return acc.result(track.track_count, track.point_count)
@@ -0,0 +1,72 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from logic.geo_utils import get_timezone, get_timezones
+from logic.track_array import TrackArray
+
+# Шаг выборки точек: пояс ищется для каждой TIMEZONE_SAMPLE_STRIDE-й точки,
+# а между выборками со сменой пояса граница уточняется делением пополам
+TIMEZONE_SAMPLE_STRIDE = 256
+
+
+@dataclass
+class TimezoneSpan:
+    start: float      # секунды от эпохи, UTC
+    end: float
+    zone: str | None  # имя зоны IANA, None — пояс не определён
+
+
+def _zone_name(tz) -> str | None:
+    return tz.zone if tz else None
+
+
+def find_timezone_spans(track: TrackArray,
+                        stride: int = TIMEZONE_SAMPLE_STRIDE) -> list:
+    """
+    Делит трек на интервалы времени с одним часовым поясом.
+
+    Пояс определяется по выборке точек с шагом stride; внутри интервалов
+    выборки, где пояс меняется, точка смены находится делением пополам.
+    Пересечение границы туда и обратно внутри одного шага не обнаруживается.
+    """
+    n = len(track)
+    if n == 0:
+        return []
+
+    lats, lons = track.lats, track.lons
+    samples = np.unique(np.append(np.arange(0, n, max(stride, 1)), n - 1))
+
+    # Выборка ищется одним пакетом; ключи кэша у get_timezones и
+    # get_timezone совпадают, поэтому пояса концов интервала сходятся
+    # с результатами деления пополам
+    sample_zones = [_zone_name(tz) for tz in
+                    get_timezones(lats[samples], lons[samples])]
+
+    def zone_at(i: int) -> str | None:
+        return _zone_name(get_timezone(float(lats[i]), float(lons[i])))
+
+    # Индексы первых точек каждого нового пояса
+    changes = []
+    for k in range(len(samples) - 1):
+        lo, hi = int(samples[k]), int(samples[k + 1])
+        lo_zone, hi_zone = sample_zones[k], sample_zones[k + 1]
+        # В одном шаге может оказаться несколько границ (например, угол
+        # трёх поясов): ищем первую, затем продолжаем от неё
+        while lo_zone != hi_zone:
+            left, right = lo, hi
+            while right - left > 1:
+                mid = (left + right) // 2
+                if zone_at(mid) == lo_zone:
+                    left = mid
+                else:
+                    right = mid
+            changes.append(right)
+            if right == hi:
+                break
+            lo, lo_zone = right, zone_at(right)
+
+    starts = [0] + changes
+    ends = [c - 1 for c in changes] + [n - 1]
+    return [TimezoneSpan(float(track.times[s]), float(track.times[e]), zone_at(s))
+            for s, e in zip(starts, ends)]
@@ -33,12 +33,13 @@ class Worker(QThread):
 
 # === Спец-поток геотеггинга с подтверждениями ===
 class GeoTagWorker(QThread):
-    def __init__(self, process_func, folder_path, gpx_path, time_correction):
+    def __init__(self, process_func, folder_path, gpx_path, time_correction, **options):
         super().__init__()
         self.func = process_func
         self.folder = folder_path
         self.gpx = gpx_path
         self.correction = time_correction
+        self.options = options  # дополнительные параметры process_func
         self.signals = WorkerSignals()
 
     def run(self):
@@ -48,7 +49,8 @@ class GeoTagWorker(QThread):
                 folder_path=self.folder,
                 gpx_path=self.gpx,
                 time_correction=self.correction,
-                confirm_callback=self.ask_confirmation
+                confirm_callback=self.ask_confirmation,
+                **self.options
             )
             self.signals.result.emit(result)
         except Exception as e:
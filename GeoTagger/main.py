@@ -1,8 +1,10 @@
 import sys
 import os
+import multiprocessing
 
 from PySide6.QtWidgets import (
-    QApplication, QMainWindow, QFileDialog, QHeaderView, QTableWidgetItem, QMessageBox, QTableWidget
+    QApplication, QMainWindow, QFileDialog, QHeaderView, QTableWidgetItem, QMessageBox, QTableWidget,
+    QLabel, QPushButton
 )
 from PySide6.QtCore import QFile, QTextStream
 from PySide6.QtGui import QIcon
@@ -14,13 +16,22 @@ import ui.resources_rc
 
 # Логика
 from logic import file_manager
-from logic.exif_handler import process_images
-from logic.gpx_parser import parse_gpx_metadata
+from logic.exif_handler import process_images, estimate_folder_time_offset
+from logic.gpx_parser import parse_gpx_metadata, probe_gpx_metadata
 from logic.logger import get_logger
 from logic.dialog_utils import show_error, show_info, show_warning
 from logic.workers import Worker, GeoTagWorker
 from logic.config import load_exiftool_path_from_file, get_exiftool_path
 from logic.exif_utils import find_exiftool
+from logic.geo_utils import warm_up_timezone_finder
+
+
+def format_match_quality(quality: dict) -> tuple:
+    """Тексты ячеек таблицы: разрыв, отрезок, скорость, уверенность"""
+    def fmt(value, scale=1.0, digits=0):
+        return "-" if value != value else f"{value * scale:.{digits}f}"  # NaN -> «-»
+    return (fmt(quality["gap"]), fmt(quality["interval"]),
+            fmt(quality["speed"], 3.6, 1), fmt(quality["confidence"], digits=2))
 
 
 class MainWindow(QMainWindow):
@@ -35,6 +46,8 @@ class MainWindow(QMainWindow):
         self.logger = get_logger()
         self.current_theme = "dark"
         self.active_threads = []
+        self.dry_run = False
+        self.match_quality = {}  # имя файла -> показатели последнего сопоставления
 
         load_exiftool_path_from_file()
 
@@ -56,9 +69,35 @@ class MainWindow(QMainWindow):
             QTableWidget.SelectRows)  # Выбор строк целиком
         self.ui.tableFiles.setSelectionMode(
             QTableWidget.SingleSelection)  # Одиночный выбор
+        # Показатели качества сопоставления после обработки
+        quality_columns = ("Разрыв, с", "Отрезок, с", "Скорость, км/ч", "Уверенность")
+        self.ui.tableFiles.setColumnCount(3 + len(quality_columns))
+        for i, title in enumerate(quality_columns, start=3):
+            self.ui.tableFiles.setHorizontalHeaderItem(i, QTableWidgetItem(title))
 
         self.ui.statusLabel.setText("")
 
+        # Дополнительные сведения о треке
+        self.track_info_labels = {}
+        for key, title in (("distance", "Дистанция:"),
+                           ("moving_time", "В движении:"),
+                           ("stopped_time", "На месте:"),
+                           ("stops", "Остановки:"),
+                           ("timezones", "Часовые пояса:")):
+            label = QLabel("-")
+            self.ui.formLayout.addRow(title, label)
+            self.track_info_labels[key] = label
+
+        # Подбор поправки времени рядом с полем ввода
+        self.btnEstimateOffset = QPushButton("Подобрать", self.ui.topPanel)
+        self.btnEstimateOffset.setMinimumHeight(32)
+        self.btnEstimateOffset.setToolTip(
+            "Подобрать поправку по снимкам, у которых уже есть GPS")
+        top_layout = self.ui.horizontalLayoutTopInfo
+        top_layout.insertWidget(
+            top_layout.indexOf(self.ui.editTimeCorrection) + 1, self.btnEstimateOffset)
+        self.ui.editTimeCorrection.setPlaceholderText("Поправка времени (±ч:мм[:сс])")
+
         self.settings_tab = SettingsTab(self)
         self.ui.verticalLayoutSettings.addWidget(self.settings_tab)
 
@@ -80,6 +119,7 @@ class MainWindow(QMainWindow):
         self.ui.btnSelectFolder.clicked.connect(self.select_folder)
         self.ui.btnLoadGPX.clicked.connect(self.load_gpx)
         self.ui.btnStart.clicked.connect(self.run_geotagging)
+        self.btnEstimateOffset.clicked.connect(self.estimate_time_offset)
         self.ui.btnClearLogs.clicked.connect(self.clear_logs)
         self.settings_tab.theme_changed.connect(self.apply_theme)
         self.settings_tab.test_data_requested.connect(self.create_test_data)
@@ -119,6 +159,7 @@ class MainWindow(QMainWindow):
         self.ui.btnSelectFolder.setEnabled(state)
         self.ui.btnLoadGPX.setEnabled(state)
         self.ui.btnStart.setEnabled(state)
+        self.btnEstimateOffset.setEnabled(state)
 
     def cleanup_thread(self, thread):
         if thread in self.active_threads:
@@ -133,6 +174,7 @@ class MainWindow(QMainWindow):
         if not folder:
             return
         self.image_folder = folder
+        self.match_quality = {}
         self.load_images(folder)
 
     def load_images(self, folder):
@@ -156,21 +198,29 @@ class MainWindow(QMainWindow):
                 i, 1, QTableWidgetItem(img.datetime_original or "-"))
             self.ui.tableFiles.setItem(
                 i, 2, QTableWidgetItem(img.gps_string or "-"))
+            quality = self.match_quality.get(img.filename)
+            if quality:
+                for column, text in enumerate(format_match_quality(quality), start=3):
+                    self.ui.tableFiles.setItem(i, column, QTableWidgetItem(text))
         self.logger.success(f"Загружено {len(images)} изображений")
         self.update_status("Изображения загружены")
         self.refresh_logs()
 
     # ------------ Загрузка GPX ------------
     def load_gpx(self):
-        path, _ = QFileDialog.getOpenFileName(
-            self, "Выберите GPX-файл", filter="*.gpx")
-        if not path:
+        paths, _ = QFileDialog.getOpenFileNames(
+            self, "Выберите файлы треков",
+            filter="Треки (*.gpx *.gpx.gz *.gpx.bz2 *.zip *.fit *.nmea *.nma *.csv *.kml *.kmz)")
+        if not paths:
             return
+        # Несколько файлов (например, по одному на день) сливаются в один трек
+        path = paths[0] if len(paths) == 1 else paths
         self.gpx_file_path = path
         self.update_status("Загрузка GPX...")
         self.set_buttons_enabled(False)
 
-        worker = Worker(parse_gpx_metadata, path)
+        # Время начала/конца читается с краёв файла, полный разбор — в фоне
+        worker = Worker(probe_gpx_metadata, path)
         self.active_threads.append(worker)
         worker.signals.result.connect(self.on_gpx_loaded)
         worker.signals.error.connect(self.on_worker_error)
@@ -178,17 +228,50 @@ class MainWindow(QMainWindow):
         worker.signals.finished.connect(lambda: self.set_buttons_enabled(True))
         worker.start()
 
-    def on_gpx_loaded(self, metadata):
+    def analyze_gpx(self, path):
+        """Полный разбор трека: статистика движения и прогрев кэша"""
+        for label in self.track_info_labels.values():
+            label.setText("…")
+        worker = Worker(parse_gpx_metadata, path)
+        self.active_threads.append(worker)
+        worker.signals.result.connect(
+            lambda metadata: self.on_gpx_analyzed(path, metadata))
+        worker.signals.error.connect(self.on_worker_error)
+        worker.signals.finished.connect(lambda: self.cleanup_thread(worker))
+        worker.start()
+
+    def show_track_info(self, metadata):
         self.ui.lblStartUTC.setText(metadata["start"])
         self.ui.lblEndUTC.setText(metadata["end"])
         self.ui.lblStartLocal.setText(metadata["start_local"])
-        self.logger.success("GPX-файл успешно загружен")
+        for key, label in self.track_info_labels.items():
+            label.setText(metadata.get(key, "-"))
+
+    def on_gpx_loaded(self, metadata):
+        self.show_track_info(metadata)
+        if isinstance(self.gpx_file_path, list):
+            self.logger.success(
+                f"Загружено GPX-файлов: {len(self.gpx_file_path)}")
+        else:
+            self.logger.success("GPX-файл успешно загружен")
         self.update_status("GPX загружен")
         self.refresh_logs()
+        self.analyze_gpx(self.gpx_file_path)
+
+    def on_gpx_analyzed(self, path, metadata):
+        # Пока шёл разбор, пользователь мог выбрать другой трек
+        if path != self.gpx_file_path:
+            return
+        self.show_track_info(metadata)
+        self.refresh_logs()
 
     # ---------- Обработка геометок ----------
     def run_geotagging(self):
-        if not self.image_folder or not self.gpx_file_path:
+        track_library = None
+        if not self.gpx_file_path:
+            # Без выбранного GPX треки берутся из архива по датам снимков
+            track_library = self.settings_tab.get_track_library()
+        if not self.image_folder or not (self.gpx_file_path or track_library):
             show_warning(self, "Ошибка",
                          "Выберите папку и GPX-файл перед запуском")
             return
@@ -233,11 +316,15 @@ class MainWindow(QMainWindow):
         self.refresh_logs()
         self.set_buttons_enabled(False)
 
+        options = self.settings_tab.get_processing_options()
+        self.dry_run = options.get("dry_run", False)
         self.geo_worker = GeoTagWorker(
             process_func=process_images,
             folder_path=self.image_folder,
             gpx_path=self.gpx_file_path,
-            time_correction=correction
+            time_correction=correction,
+            track_library=track_library,
+            **options
         )
         self.active_threads.append(self.geo_worker)
 
@@ -258,14 +345,46 @@ class MainWindow(QMainWindow):
         callback(result)
 
     def on_geotagging_done(self, result):
-        updated, total = result
-        msg = f"Геометки добавлены в {updated} из {total} файлов"
+        updated, total, self.match_quality = result
+        if self.dry_run:
+            msg = f"Пробный запуск: проверено {total} файлов, сводка — в журнале"
+        else:
+            msg = f"Геометки добавлены в {updated} из {total} файлов"
         self.logger.success(msg)
         self.update_status("Обработка завершена")
         show_info(self, "Готово", msg)
         self.refresh_logs()
         self.load_images(self.image_folder)
 
+    # ---------- Подбор поправки времени ----------
+    def estimate_time_offset(self):
+        if not self.image_folder or not self.gpx_file_path:
+            show_warning(self, "Ошибка",
+                         "Выберите папку и GPX-файл перед подбором поправки")
+            return
+        self.update_status("Подбор поправки...")
+        self.set_buttons_enabled(False)
+
+        worker = Worker(estimate_folder_time_offset,
+                        self.image_folder, self.gpx_file_path)
+        self.active_threads.append(worker)
+        worker.signals.result.connect(self.on_offset_estimated)
+        worker.signals.error.connect(self.on_worker_error)
+        worker.signals.finished.connect(lambda: self.cleanup_thread(worker))
+        worker.signals.finished.connect(lambda: self.set_buttons_enabled(True))
+        worker.start()
+
+    def on_offset_estimated(self, estimate):
+        if estimate is None:
+            self.update_status("Поправка не найдена")
+            show_warning(self, "Подбор поправки",
+                         "Снимки с GPS не совпадают с треком ни при какой поправке")
+        else:
+            self.ui.editTimeCorrection.setText(estimate.correction)
+            self.update_status(
+                f"Поправка {estimate.correction} (±{estimate.residual_m:.0f} м)")
+        self.refresh_logs()
+
     def on_worker_error(self, err):
         exctype, value, trace = err
         self.logger.error(f"Ошибка: {value}")
@@ -293,9 +412,7 @@ class MainWindow(QMainWindow):
             self.image_folder = os.path.dirname(self.gpx_file_path)
 
             metadata = parse_gpx_metadata(self.gpx_file_path)
-            self.ui.lblStartUTC.setText(metadata["start"])
-            self.ui.lblEndUTC.setText(metadata["end"])
-            self.ui.lblStartLocal.setText(metadata["start_local"])
+            self.show_track_info(metadata)
 
             self.load_images(self.image_folder)
             self.update_status("Тестовые данные загружены")
@@ -342,6 +459,10 @@ class MainWindow(QMainWindow):
 
 
 if __name__ == "__main__":
+    # Нужно для пула процессов при разборе больших GPX (Windows/сборка exe)
+    multiprocessing.freeze_support()
+    # Данные часовых поясов грузятся, пока строится окно
+    warm_up_timezone_finder()
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
@@ -0,0 +1,34 @@
+import numpy as np
+
+from logic.track_array import TrackArray, merge_tracks
+from logic.track_index import TrackIndex, STATUS_MATCHED
+
+
+def _track(times, segments=None):
+    times = np.asarray(times, dtype=np.float64)
+    return TrackArray.from_columns(times, 50 + times * 1e-5, 20 + times * 1e-5,
+                                   segments, track_count=1)
+
+
+def test_later_file_fills_pause_of_earlier():
+    # Файл A — два сегмента с паузой, файл B записан во время паузы
+    a = _track(np.concatenate((np.arange(0, 101), np.arange(5000, 5101))),
+               np.repeat([0, 1], 101))
+    b = _track(np.arange(2000, 3000))
+
+    merged = merge_tracks([a, b])
+
+    assert len(merged) == len(a) + len(b)
+    _, _, status = TrackIndex(merged).match_many(np.array([2500.5]))
+    assert status[0] == STATUS_MATCHED
+
+
+def test_overlap_keeps_one_source():
+    a = _track(np.arange(0, 200))
+    b = _track(np.arange(100.5, 300.5))
+
+    merged = merge_tracks([b, a])
+
+    assert np.all(np.diff(merged.times) > 0)
+    _, _, status = TrackIndex(merged).match_many(np.arange(110, 196) + 0.25)
+    assert np.all(status == STATUS_MATCHED)
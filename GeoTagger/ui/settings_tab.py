@@ -1,14 +1,17 @@
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
-    QGroupBox, QFormLayout, QComboBox, QFileDialog, QMessageBox, QApplication
+    QGroupBox, QFormLayout, QComboBox, QFileDialog, QMessageBox, QApplication,
+    QCheckBox, QDoubleSpinBox, QSpinBox
 )
 from PySide6.QtCore import QFile, QTextStream, Signal
 from PySide6.QtGui import QIcon
 import subprocess
 import os
 
-from logic.config import set_exiftool_path
+from logic.config import set_exiftool_path, get_setting, set_setting
 from logic.logger import get_logger
+from logic.privacy_zones import ZONE_ACTIONS
+from logic.track_index import NEAREST_POINT_LIMIT
 
 logger = get_logger()
 
@@ -69,6 +72,95 @@ class SettingsTab(QWidget):
 
         app_layout.addLayout(button_layout)
         layout.addWidget(self.app_group)
+
+        self.library_group = QGroupBox("Архив GPX")
+        library_layout = QVBoxLayout(self.library_group)
+
+        library_info = QFormLayout()
+        self.library_label = QLabel(get_setting("gpx_library_path") or "Не выбран")
+        self.library_label.setWordWrap(True)
+        library_info.addRow("Папка:", self.library_label)
+        library_layout.addLayout(library_info)
+
+        library_buttons = QHBoxLayout()
+        self.select_library_button = QPushButton("Выбрать архив GPX")
+        self.select_library_button.setIcon(QIcon(":/icons/folder.png"))
+        self.clear_library_button = QPushButton("Не использовать архив")
+        self.clear_library_button.setIcon(QIcon(":/icons/clear.png"))
+        library_buttons.addWidget(self.select_library_button)
+        library_buttons.addWidget(self.clear_library_button)
+        library_buttons.addStretch()
+        library_layout.addLayout(library_buttons)
+
+        layout.addWidget(self.library_group)
+
+        self.processing_group = QGroupBox("Обработка")
+        processing_layout = QVBoxLayout(self.processing_group)
+        self.prune_track_check = QCheckBox(
+            "Загружать только участок трека на время снимков")
+        self.prune_track_check.setChecked(bool(get_setting("prune_track", False)))
+        processing_layout.addWidget(self.prune_track_check)
+
+        # Не сохраняется между запусками, чтобы не забыть включённым
+        self.dry_run_check = QCheckBox(
+            "Пробный запуск: только сводка сопоставления, без записи в файлы")
+        processing_layout.addWidget(self.dry_run_check)
+
+        simplify_layout = QFormLayout()
+        self.simplify_spin = QDoubleSpinBox()
+        self.simplify_spin.setRange(0, 100)
+        self.simplify_spin.setDecimals(1)
+        self.simplify_spin.setSuffix(" м")
+        self.simplify_spin.setSpecialValueText("Выкл.")
+        self.simplify_spin.setMaximumWidth(200)
+        self.simplify_spin.setValue(float(get_setting("simplify_tolerance_m", 0) or 0))
+        simplify_layout.addRow("Упрощение трека (допуск):", self.simplify_spin)
+
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setRange(1, os.cpu_count() or 1)
+        self.workers_spin.setMaximumWidth(200)
+        self.workers_spin.setValue(int(get_setting("workers", 1) or 1))
+        simplify_layout.addRow("Процессов для чтения снимков:", self.workers_spin)
+
+        self.min_confidence_spin = QDoubleSpinBox()
+        self.min_confidence_spin.setRange(0, 1)
+        self.min_confidence_spin.setDecimals(2)
+        self.min_confidence_spin.setSingleStep(0.05)
+        self.min_confidence_spin.setSpecialValueText("Выкл.")
+        self.min_confidence_spin.setMaximumWidth(200)
+        self.min_confidence_spin.setValue(float(get_setting("min_confidence", 0) or 0))
+        simplify_layout.addRow("Пропускать при уверенности ниже:", self.min_confidence_spin)
+        processing_layout.addLayout(simplify_layout)
+        layout.addWidget(self.processing_group)
+
+        self.privacy_group = QGroupBox("Зоны приватности")
+        privacy_layout = QVBoxLayout(self.privacy_group)
+
+        privacy_info = QFormLayout()
+        self.privacy_label = QLabel(get_setting("privacy_zones_path") or "Не выбраны")
+        self.privacy_label.setWordWrap(True)
+        privacy_info.addRow("Файл GeoJSON:", self.privacy_label)
+        self.zone_action_combo = QComboBox()
+        self.zone_action_combo.addItems(["Не записывать координаты", "Огрублять координаты"])
+        self.zone_action_combo.setMaximumWidth(200)
+        action = get_setting("zone_action", ZONE_ACTIONS[0])
+        self.zone_action_combo.setCurrentIndex(
+            ZONE_ACTIONS.index(action) if action in ZONE_ACTIONS else 0)
+        privacy_info.addRow("Снимки внутри зон:", self.zone_action_combo)
+        privacy_layout.addLayout(privacy_info)
+
+        privacy_buttons = QHBoxLayout()
+        self.select_privacy_button = QPushButton("Выбрать зоны")
+        self.select_privacy_button.setIcon(QIcon(":/icons/folder.png"))
+        self.clear_privacy_button = QPushButton("Не использовать зоны")
+        self.clear_privacy_button.setIcon(QIcon(":/icons/clear.png"))
+        privacy_buttons.addWidget(self.select_privacy_button)
+        privacy_buttons.addWidget(self.clear_privacy_button)
+        privacy_buttons.addStretch()
+        privacy_layout.addLayout(privacy_buttons)
+
+        layout.addWidget(self.privacy_group)
+
         layout.addStretch()
 
     def _connect_signals(self):
@@ -77,6 +169,20 @@ class SettingsTab(QWidget):
         self.select_exiftool_button.clicked.connect(self.select_exiftool)
         self.test_arw_button.clicked.connect(
             lambda: self.parent().test_arw_write())
+        self.select_library_button.clicked.connect(self.select_track_library)
+        self.clear_library_button.clicked.connect(self.clear_track_library)
+        self.prune_track_check.toggled.connect(
+            lambda checked: set_setting("prune_track", checked))
+        self.simplify_spin.valueChanged.connect(
+            lambda value: set_setting("simplify_tolerance_m", value))
+        self.workers_spin.valueChanged.connect(
+            lambda value: set_setting("workers", value))
+        self.min_confidence_spin.valueChanged.connect(
+            lambda value: set_setting("min_confidence", value))
+        self.select_privacy_button.clicked.connect(self.select_privacy_zones)
+        self.clear_privacy_button.clicked.connect(self.clear_privacy_zones)
+        self.zone_action_combo.currentIndexChanged.connect(
+            lambda index: set_setting("zone_action", ZONE_ACTIONS[index]))
 
     def _change_theme(self, theme_name):
         theme = "dark" if theme_name == "Темная" else "light"
@@ -91,6 +197,57 @@ class SettingsTab(QWidget):
     def _create_test_data(self):
         self.test_data_requested.emit()
 
+    def get_processing_options(self) -> dict:
+        """Дополнительные параметры для process_images"""
+        options = {}
+        if self.prune_track_check.isChecked():
+            options["prune_margin"] = NEAREST_POINT_LIMIT
+        if self.simplify_spin.value() > 0:
+            options["simplify_tolerance_m"] = self.simplify_spin.value()
+        if self.min_confidence_spin.value() > 0:
+            options["min_confidence"] = self.min_confidence_spin.value()
+        if self.dry_run_check.isChecked():
+            options["dry_run"] = True
+        if self.workers_spin.value() > 1:
+            options["workers"] = self.workers_spin.value()
+        path = get_setting("privacy_zones_path")
+        if path and os.path.isfile(path):
+            options["privacy_zones"] = path
+            options["zone_action"] = ZONE_ACTIONS[self.zone_action_combo.currentIndex()]
+        return options
+
+    def get_track_library(self) -> str | None:
+        """Папка архива GPX или None, если архив не используется"""
+        path = get_setting("gpx_library_path")
+        return path if path and os.path.isdir(path) else None
+
+    def select_track_library(self):
+        folder = QFileDialog.getExistingDirectory(self, "Папка архива GPX")
+        if not folder:
+            return
+        set_setting("gpx_library_path", folder)
+        self.library_label.setText(folder)
+        logger.info(f"Выбран архив GPX: {folder}")
+
+    def clear_track_library(self):
+        set_setting("gpx_library_path", None)
+        self.library_label.setText("Не выбран")
+        logger.info("Архив GPX отключён")
+
+    def select_privacy_zones(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Зоны приватности", filter="GeoJSON (*.geojson *.json)")
+        if not path:
+            return
+        set_setting("privacy_zones_path", path)
+        self.privacy_label.setText(path)
+        logger.info(f"Выбраны зоны приватности: {path}")
+
+    def clear_privacy_zones(self):
+        set_setting("privacy_zones_path", None)
+        self.privacy_label.setText("Не выбраны")
+        logger.info("Зоны приватности отключены")
+
     def update_exiftool_status(self, path):
         """
         Обновляет label в настройках.